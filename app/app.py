@@ -22,7 +22,10 @@ import plotly.graph_objects as go
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from src.load_model import load_trained_model, load_preprocessor
-from src.data_preprocessing import DataPreprocessor
+from src.fast_predictor import FastPredictor
+from src.prediction_cache import PredictionCache, model_file_signature
+from src.lookup_table import MIN_AGREEMENT, LookupTable
+from src.schema import read_dataset
 
 # Configuração da página
 st.set_page_config(
@@ -1331,50 +1334,70 @@ TRANSLATIONS = {
     }
 }
 
+MODEL_PATH = 'models/obesity_model.joblib'
+# Modo lookup (opcional): caminho da tabela gerada por `python -m src.lookup_table build`
+LOOKUP_TABLE_PATH = os.environ.get('LOOKUP_TABLE_PATH')
+# Concordância mínima da tabela com o modelo (medida em `build`/`agreement`)
+LOOKUP_MIN_AGREEMENT = float(os.environ.get('LOOKUP_MIN_AGREEMENT', MIN_AGREEMENT))
+# Colunas usadas pela página de Insights (projeção na leitura do dataset)
+INSIGHTS_COLUMNS = ['Gender', 'Age', 'Height', 'Weight', 'family_history', 'FAVC',
+                    'FCVC', 'NCP', 'CH2O', 'FAF', 'TUE', 'Obesity']
+
 # Função para carregar modelo (com cache)
+# model_signature (mtime/tamanho do arquivo) faz parte da chave do cache:
+# se o modelo for re-treinado e salvo, ele é recarregado automaticamente
 @st.cache_resource
-def load_model():
+def load_model(model_signature=None):
     """Carrega o modelo e pré-processador"""
     try:
-        model = load_trained_model('models/obesity_model.joblib')
+        model = load_trained_model(MODEL_PATH)
         preprocessor_data = load_preprocessor('models/preprocessor.joblib')
         return model, preprocessor_data
     except Exception as e:
         st.error(f"Erro ao carregar modelo: {str(e)}")
         return None, None
 
+# Compila o caminho rápido de inferência uma única vez por modelo carregado
+@st.cache_resource
+def load_fast_predictor(_model, _preprocessor_data, model_signature=None):
+    """Cria o FastPredictor a partir do modelo e pré-processador carregados"""
+    return FastPredictor(_model, _preprocessor_data)
+
+# Cache de resultados compartilhado entre sessões (invalidado se o modelo mudar)
+@st.cache_resource
+def get_prediction_cache():
+    """Cria o cache LRU/TTL de predições"""
+    return PredictionCache(maxsize=1024, ttl_seconds=3600, model_path=MODEL_PATH)
+
+# Tabela pré-computada, usada apenas se existir, corresponder ao modelo atual
+# e concordar com ele em ao menos LOOKUP_MIN_AGREEMENT das linhas medidas
+@st.cache_resource
+def load_lookup_table(path, model_signature=None):
+    """Mapeia em memória a tabela do modo lookup"""
+    if not path or not os.path.exists(path):
+        return None
+    table = LookupTable.load(path)
+    if table.is_stale(MODEL_PATH):
+        return None
+    if not table.is_accurate(LOOKUP_MIN_AGREEMENT):
+        measured = 'não medida' if table.agreement is None else f"{table.agreement['agreement']:.1%}"
+        st.warning(f"⚠️ Modo lookup desativado: concordância da tabela com o modelo "
+                   f"({measured}) abaixo do mínimo de {LOOKUP_MIN_AGREEMENT:.0%}. "
+                   f"Usando o modelo.")
+        return None
+    return table
+
 # Função para fazer predição
 def make_prediction(input_data, model, preprocessor_data):
     """Faz predição usando o modelo treinado"""
     try:
-        # Criar DataFrame com os dados de entrada
-        df = pd.DataFrame([input_data])
-        
-        # Pré-processar dados
-        preprocessor = DataPreprocessor()
-        preprocessor.label_encoders = preprocessor_data['label_encoders']
-        preprocessor.scaler = preprocessor_data['scaler']
-        preprocessor.feature_names = preprocessor_data['feature_names']
-        
-        # Aplicar pré-processamento
-        df_processed = preprocessor.handle_missing_values(df)
-        df_processed = preprocessor.encode_categorical(df_processed, fit=False)
-        
-        # Criar IMC
-        df_processed = preprocessor.create_bmi(df_processed)
-        
-        # Preparar features (sem target)
-        X = df_processed[preprocessor.feature_names]
-        
-        # Normalizar
-        X_scaled = preprocessor.scale_features(X, fit=False)
-        
-        # Fazer predição
-        prediction = model.predict(X_scaled)[0]
-        probabilities = model.predict_proba(X_scaled)[0]
-        classes = model.classes_
-        
-        return prediction, probabilities, classes
+        signature = model_file_signature(MODEL_PATH)
+        predictor = load_lookup_table(LOOKUP_TABLE_PATH, signature)
+        if predictor is None:
+            predictor = load_fast_predictor(model, preprocessor_data, signature)
+        return get_prediction_cache().get_or_compute(
+            input_data, lambda: predictor.predict(input_data)
+        )
         
     except Exception as e:
         st.error(f"Erro ao fazer predição: {str(e)}")
@@ -1659,7 +1682,7 @@ elif selected == "Predição de Obesidade":
     st.markdown("---")
     
     # Carregar modelo
-    model, preprocessor_data = load_model()
+    model, preprocessor_data = load_model(model_file_signature(MODEL_PATH))
     
     if model is None or preprocessor_data is None:
         st.error("Não foi possível carregar o modelo. Verifique se os arquivos estão no diretório correto.")
@@ -1917,7 +1940,9 @@ elif selected == "Insights e Métricas":
     def load_data():
         """Carrega os dados"""
         try:
-            df = pd.read_csv('data/obesity.csv')
+            # Cópia colunar do CSV (src/schema.py), só com as colunas usadas,
+            # mapeada sem cópia: a página só agrega e filtra
+            df = read_dataset('data/obesity.csv', columns=INSIGHTS_COLUMNS, read_only=True)
             # Criar IMC
             df['BMI'] = df['Weight'] / (df['Height'] ** 2)
             return df
@@ -2074,6 +2099,8 @@ elif selected == "Insights e Métricas":
         with col1:
             # Gráfico de barras
             obesity_counts = df_filtered['Obesity'].value_counts()
+            # Categorias removidas pelos filtros aparecem com contagem zero
+            obesity_counts = obesity_counts[obesity_counts > 0]
             # Traduzir labels
             obesity_counts_pt = pd.Series({
                 OBESITY_LEVELS_PT.get(k, k): v for k, v in obesity_counts.items()
@@ -2137,7 +2164,7 @@ elif selected == "Insights e Métricas":
             st.plotly_chart(fig_gender, use_container_width=True)
         
         with col2:
-            avg_bmi_gender = df_filtered.groupby('Gender')['BMI'].mean()
+            avg_bmi_gender = df_filtered.groupby('Gender', observed=True)['BMI'].mean()
             avg_bmi_gender.index = ['Feminino' if idx == 'Female' else 'Masculino' for idx in avg_bmi_gender.index]
             
             fig_bmi_gender = px.bar(
@@ -2358,7 +2385,7 @@ elif selected == "Insights e Métricas":
             
             with col4:
                 # Consumo de vegetais
-                fcvc_obesity = df_filtered.groupby('Obesity')['FCVC'].mean()
+                fcvc_obesity = df_filtered.groupby('Obesity', observed=True)['FCVC'].mean()
                 fcvc_obesity.index = [OBESITY_LEVELS_PT.get(idx, idx) for idx in fcvc_obesity.index]
                 
                 fig_fcvc = px.bar(
@@ -2631,7 +2658,7 @@ elif selected == "Insights e Métricas":
                 # Estatísticas por nível de obesidade
                 st.subheader(f"📊 Estatísticas por Nível de Obesidade - {selected_dist_var}")
                 
-                stats_by_obesity = df_filtered.groupby('Obesity')[selected_dist_var].agg(['mean', 'median', 'std', 'min', 'max']).round(2)
+                stats_by_obesity = df_filtered.groupby('Obesity', observed=True)[selected_dist_var].agg(['mean', 'median', 'std', 'min', 'max']).round(2)
                 stats_by_obesity.index = [OBESITY_LEVELS_PT.get(idx, idx) for idx in stats_by_obesity.index]
                 stats_by_obesity.columns = ['Média', 'Mediana', 'Desvio Padrão', 'Mínimo', 'Máximo']
                 st.dataframe(stats_by_obesity, use_container_width=True)
@@ -2669,7 +2696,7 @@ elif selected == "Insights e Métricas":
             st.subheader("🔍 Principais Descobertas")
             
             # Insight 1: Gênero
-            gender_obesity_rate = df_filtered.groupby('Gender')['Obesity'].apply(
+            gender_obesity_rate = df_filtered.groupby('Gender', observed=True)['Obesity'].apply(
                 lambda x: (x.str.contains('Obesity|Overweight').sum() / len(x)) * 100
             )
             dominant_gender = gender_obesity_rate.idxmax()
@@ -0,0 +1,84 @@
+"""
+Benchmark: codificação de categóricas com valores não vistos em lotes grandes
+Tech Challenge - Sistema Preditivo de Obesidade
+
+Compara o fallback antigo (uma chamada ao sklearn por linha) com a tabela
+categoria -> código vetorizada de DataPreprocessor.encode_categorical.
+
+Uso (a partir da raiz do projeto):
+    python benchmarks/bench_encode_categorical.py --sizes 10000 100000 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.data_preprocessing import DataPreprocessor
+from src.load_model import load_preprocessor
+
+
+def legacy_encode(df, label_encoders):
+    """Implementação original de encode_categorical(fit=False)"""
+    for col in df.select_dtypes(include=['object']).columns:
+        if col in label_encoders:
+            try:
+                df[col] = label_encoders[col].transform(df[col].astype(str))
+            except ValueError:
+                df[col] = df[col].map(
+                    lambda x: label_encoders[col].transform([x])[0]
+                    if x in label_encoders[col].classes_
+                    else 0
+                )
+    return df
+
+
+def make_batch(n_rows, label_encoders, seed=42):
+    """Gera um lote com categorias válidas e um valor não visto por coluna"""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for col, le in label_encoders.items():
+        values = rng.choice(le.classes_, size=n_rows).astype(object)
+        values[0] = 'valor_desconhecido'
+        data[col] = values
+    return pd.DataFrame(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--legacy-max-rows', type=int, default=100_000,
+                        help='Acima deste tamanho o caminho antigo não é executado')
+    parser.add_argument('--preprocessor', default='models/preprocessor.joblib')
+    args = parser.parse_args()
+
+    label_encoders = load_preprocessor(args.preprocessor)['label_encoders']
+    preprocessor = DataPreprocessor()
+    preprocessor.label_encoders = label_encoders
+
+    print("=" * 60)
+    print("CODIFICAÇÃO COM VALORES NÃO VISTOS")
+    print("=" * 60)
+    for n_rows in args.sizes:
+        batch = make_batch(n_rows, label_encoders)
+
+        start = time.perf_counter()
+        encoded = preprocessor.encode_categorical(batch.copy(), fit=False)
+        new_time = time.perf_counter() - start
+
+        line = f"{n_rows:>10,} linhas  vetorizado={new_time:8.3f} s"
+        if n_rows <= args.legacy_max_rows:
+            start = time.perf_counter()
+            expected = legacy_encode(batch.copy(), label_encoders)
+            legacy_time = time.perf_counter() - start
+            assert (encoded.to_numpy() == expected.to_numpy()).all()
+            line += f"  antigo={legacy_time:8.3f} s  ganho={legacy_time / new_time:7.1f}x"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Microbenchmark: latência por predição do pipeline antigo vs FastPredictor
+Tech Challenge - Sistema Preditivo de Obesidade
+
+Uso (a partir da raiz do projeto):
+    python benchmarks/bench_fast_predictor.py --repeat 500
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.load_model import load_trained_model, load_preprocessor
+from src.data_preprocessing import DataPreprocessor
+from src.fast_predictor import FastPredictor
+
+INPUT_DATA = {
+    'Gender': 'Male',
+    'Age': 30,
+    'Height': 1.70,
+    'Weight': 70.0,
+    'family_history': 'yes',
+    'FAVC': 'yes',
+    'FCVC': 2,
+    'NCP': 3,
+    'CAEC': 'Sometimes',
+    'SMOKE': 'no',
+    'CH2O': 2,
+    'SCC': 'no',
+    'FAF': 1,
+    'TUE': 1,
+    'CALC': 'Sometimes',
+    'MTRANS': 'Public_Transportation'
+}
+
+
+def legacy_prediction(input_data, model, preprocessor_data):
+    """Pipeline original de make_prediction (DataFrame de uma linha)"""
+    df = pd.DataFrame([input_data])
+    preprocessor = DataPreprocessor()
+    preprocessor.label_encoders = preprocessor_data['label_encoders']
+    preprocessor.scaler = preprocessor_data['scaler']
+    preprocessor.feature_names = preprocessor_data['feature_names']
+    df_processed = preprocessor.handle_missing_values(df)
+    df_processed = preprocessor.encode_categorical(df_processed, fit=False)
+    df_processed = preprocessor.create_bmi(df_processed)
+    X = df_processed[preprocessor.feature_names]
+    X_scaled = preprocessor.scale_features(X, fit=False)
+    prediction = model.predict(X_scaled)[0]
+    probabilities = model.predict_proba(X_scaled)[0]
+    return prediction, probabilities, model.classes_
+
+
+def time_calls(func, repeat):
+    """Mede a latência de cada chamada em milissegundos"""
+    func()  # aquecimento
+    timings = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings[i] = (time.perf_counter() - start) * 1000
+    return timings
+
+
+def report(name, timings):
+    print(f"{name:<16} média={timings.mean():8.3f} ms  "
+          f"p50={np.percentile(timings, 50):8.3f} ms  "
+          f"p99={np.percentile(timings, 99):8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--model', default='models/obesity_model.joblib')
+    parser.add_argument('--preprocessor', default='models/preprocessor.joblib')
+    args = parser.parse_args()
+
+    model = load_trained_model(args.model)
+    preprocessor_data = load_preprocessor(args.preprocessor)
+    predictor = FastPredictor(model, preprocessor_data)
+
+    # Os dois caminhos devem produzir o mesmo resultado
+    legacy = legacy_prediction(INPUT_DATA, model, preprocessor_data)
+    fast = predictor.predict(INPUT_DATA)
+    assert legacy[0] == fast[0]
+    assert np.allclose(legacy[1], fast[1])
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        legacy_times = time_calls(
+            lambda: legacy_prediction(INPUT_DATA, model, preprocessor_data), args.repeat
+        )
+    fast_times = time_calls(lambda: predictor.predict(INPUT_DATA), args.repeat)
+
+    print("=" * 60)
+    print(f"LATÊNCIA POR PREDIÇÃO ({args.repeat} chamadas)")
+    print("=" * 60)
+    report("make_prediction", legacy_times)
+    report("FastPredictor", fast_times)
+    print(f"\n🚀 Ganho (mediana): {np.median(legacy_times) / np.median(fast_times):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark: motores de busca de hiperparâmetros vs grade exaustiva
+Tech Challenge - Sistema Preditivo de Obesidade
+
+Para cada motor mostra o melhor score (F1 ponderado na validação cruzada),
+o número de linhas em que ele foi medido, o número de ajustes, o total de
+árvores construídas, o tempo total, o tempo até o próprio melhor score e o
+tempo até alcançar o melhor score da grade (menos --tolerance). Com o recurso
+n_samples (halving/hyperband em LogisticRegression e SVM), o melhor score
+vem de uma subamostra e não é comparável ao da grade: a linha é marcada com *.
+
+Uso (a partir da raiz do projeto):
+    python benchmarks/bench_hyperparameter_search.py --model RandomForest
+    python benchmarks/bench_hyperparameter_search.py --model RandomForest --engines grid warm_start
+    python benchmarks/bench_hyperparameter_search.py --model SVM --engines grid random hyperband --budget 60
+"""
+import argparse
+import os
+import sys
+
+# train_model.py usa imports relativos à pasta src
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from data_preprocessing import DataPreprocessor, split_data
+from hyperparameter_search import SEARCH_ENGINES, engines_for, run_search, time_to_score
+from train_model import ModelTrainer
+
+
+def format_seconds(value):
+    return f"{value:.1f}s" if value is not None else "—"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--model', default='RandomForest')
+    parser.add_argument('--engines', nargs='+', choices=list(SEARCH_ENGINES),
+                        help='Motores comparados (padrão: todos os aplicáveis ao modelo)')
+    parser.add_argument('--budget', type=float, default=None,
+                        help='Orçamento de tempo por motor, em segundos')
+    parser.add_argument('--tolerance', type=float, default=0.002,
+                        help='Folga em relação ao melhor score da grade')
+    parser.add_argument('--data', default='data/obesity.csv')
+    args = parser.parse_args()
+
+    preprocessor = DataPreprocessor()
+    X, y = preprocessor.preprocess(preprocessor.load_data(args.data), fit=True, scale=True)
+    X_train, _, y_train, _ = split_data(X, y)
+    estimator = ModelTrainer().get_models_to_test()[args.model]
+
+    # A grade é sempre executada primeiro: é a referência de score
+    engines = ['grid'] + [engine for engine in args.engines or engines_for(args.model)
+                          if engine != 'grid']
+    results = {}
+    for engine in engines:
+        print(f"\n🔧 {engine}...")
+        results[engine] = run_search(engine, args.model, estimator, X_train, y_train,
+                                     budget_seconds=args.budget)
+    target = results['grid']['best_score'] - args.tolerance
+
+    print("\n" + "=" * 109)
+    print(f"{args.model}: alvo = melhor score da grade - {args.tolerance} = {target:.4f}")
+    print("=" * 109)
+    print(f"{'motor':<10} {'melhor F1':>10} {'linhas':>12} {'ajustes':>8} {'árvores':>9} "
+          f"{'tempo total':>12} {'até o próprio melhor':>21} {'até o alvo':>11}")
+    subsampled = False
+    for engine, result in results.items():
+        own_best = time_to_score(result, result['best_score'])
+        rows = result['score_rows'] or len(y_train)
+        mark = '*' if rows < len(y_train) else ''
+        subsampled = subsampled or bool(mark)
+        print(f"{engine + mark:<10} {result['best_score']:>10.4f} "
+              f"{f'{rows}/{len(y_train)}':>12} {result['n_fits']:>8} "
+              f"{result['n_trees']:>9,} {format_seconds(result['elapsed']):>12} "
+              f"{format_seconds(own_best):>21} "
+              f"{format_seconds(time_to_score(result, target)):>11}")
+    if subsampled:
+        print("* melhor score medido em uma subamostra (recurso n_samples): "
+              "não comparável ao score da grade")
+
+
+if __name__ == "__main__":
+    main()
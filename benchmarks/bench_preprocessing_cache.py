@@ -0,0 +1,58 @@
+"""
+Benchmark: pré-processamento completo vs cache por impressão digital
+Tech Challenge - Sistema Preditivo de Obesidade
+
+Replica o CSV real até o número de linhas pedido, mede o caminho frio
+(leitura + preprocess + gravação do cache) e o caminho quente
+(data_fingerprint + load_cache com X mapeado em memória).
+
+Uso (a partir da raiz do projeto):
+    python benchmarks/bench_preprocessing_cache.py --sizes 2111 100000 1000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.data_preprocessing import DataPreprocessor, data_fingerprint
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[2_111, 100_000, 1_000_000])
+    parser.add_argument('--data', default='data/obesity.csv')
+    args = parser.parse_args()
+
+    base = pd.read_csv(args.data)
+    print("=" * 70)
+    print(f"{'linhas':>10} {'preprocess':>14} {'cache':>12} {'ganho':>8} {'idêntico':>10}")
+    print("=" * 70)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_rows in args.sizes:
+            csv_path = os.path.join(tmp_dir, f'obesity_{n_rows}.csv')
+            cache_dir = os.path.join(tmp_dir, f'cache_{n_rows}')
+            repeats = -(-n_rows // len(base))
+            pd.concat([base] * repeats, ignore_index=True).head(n_rows).to_csv(csv_path, index=False)
+
+            start = time.perf_counter()
+            preprocessor = DataPreprocessor()
+            X, y = preprocessor.preprocess(preprocessor.load_data(csv_path), fit=True, scale=True)
+            cold = time.perf_counter() - start
+            preprocessor.save_cache(X, y, data_fingerprint(csv_path), cache_dir)
+
+            start = time.perf_counter()
+            X_cached, y_cached = DataPreprocessor().load_cache(data_fingerprint(csv_path), cache_dir)
+            warm = time.perf_counter() - start
+
+            identical = X.equals(X_cached) and y.equals(y_cached)
+            print(f"{n_rows:>10,} {cold * 1000:>11.1f} ms {warm * 1000:>9.1f} ms "
+                  f"{cold / warm:>7.1f}x {str(identical):>10}")
+
+
+if __name__ == "__main__":
+    main()
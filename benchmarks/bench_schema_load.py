@@ -0,0 +1,114 @@
+"""
+Benchmark: leitura do CSV com tipos padrão vs esquema tipado e cópia colunar
+Tech Challenge - Sistema Preditivo de Obesidade
+
+Gera (uma vez, o mesmo arquivo de bench_streaming_training.py) um CSV
+sintético, converte-o para a cópia colunar de src/schema.py (tempo
+mostrado à parte) e, em um processo separado por modo, mede:
+    padrão    pd.read_csv: texto como object, numéricas como float64
+    esquema   read_dataset(cache=False): CSV com category e float32
+    colunar   read_dataset: cópia colunar (Feather), DataFrame gravável
+    mapeada   read_dataset(read_only=True): cópia colunar mapeada em memória
+    projeção  o mesmo só com as colunas usadas pela página de Insights
+o tempo de leitura, a memória do DataFrame (memory_usage(deep=True)), o pico
+de memória do processo (RSS máximo) e o tempo das agregações da página de
+Insights (value_counts, crosstab, groupby com média e taxa de obesidade).
+
+Uso (a partir da raiz do projeto):
+    python benchmarks/bench_schema_load.py --rows 10000000
+    python benchmarks/bench_schema_load.py --rows 1000000
+"""
+import argparse
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_streaming_training import generate_file
+from src.schema import convert_dataset, read_dataset
+
+# Colunas usadas pela página de Insights (INSIGHTS_COLUMNS em app/app.py)
+INSIGHTS_COLUMNS = ['Gender', 'Age', 'Height', 'Weight', 'family_history', 'FAVC',
+                    'FCVC', 'NCP', 'CH2O', 'FAF', 'TUE', 'Obesity']
+
+LOADERS = {
+    'padrão': pd.read_csv,
+    'esquema': lambda path: read_dataset(path, cache=False),
+    'colunar': read_dataset,
+    'mapeada': lambda path: read_dataset(path, read_only=True),
+    'projeção': lambda path: read_dataset(path, columns=INSIGHTS_COLUMNS, read_only=True),
+}
+
+
+def insights_queries(df):
+    """Agregações feitas pela página de Insights sobre o DataFrame inteiro"""
+    df['BMI'] = df['Weight'] / (df['Height'] ** 2)
+    df['Obesity'].value_counts()
+    pd.crosstab(df['Gender'], df['Obesity'])
+    df.groupby('Obesity', observed=True)['FCVC'].agg(['mean', 'median', 'std', 'min', 'max'])
+    df.groupby('Gender', observed=True)['BMI'].mean()
+    df.groupby('Gender', observed=True)['Obesity'].apply(
+        lambda x: (x.str.contains('Obesity|Overweight').sum() / len(x)) * 100
+    )
+
+
+def _convert_in_child(path):
+    """Converte o CSV para a cópia colunar fora do processo principal"""
+    start = time.perf_counter()
+    feather_path = convert_dataset(path)
+    return time.perf_counter() - start, os.path.getsize(feather_path)
+
+
+def _load_in_child(path, mode):
+    """Executa em processo próprio para medir o pico de memória isoladamente"""
+    start = time.perf_counter()
+    df = LOADERS[mode](path)
+    load_seconds = time.perf_counter() - start
+    frame_mb = df.memory_usage(deep=True).sum() / 1024 ** 2
+
+    start = time.perf_counter()
+    insights_queries(df)
+    query_seconds = time.perf_counter() - start
+    # ru_maxrss está em KB no Linux
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return load_seconds, frame_mb, peak_rss_mb, query_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--path', default=None,
+                        help='Arquivo sintético (padrão: /tmp/obesity_<rows>.csv, reaproveitado)')
+    parser.add_argument('--data', default='data/obesity.csv')
+    args = parser.parse_args()
+
+    path = args.path or os.path.join('/tmp', f'obesity_{args.rows}.csv')
+    if not os.path.exists(path):
+        print(f"🔧 Gerando {path}...")
+        generate_file(args.data, path, args.rows)
+    print(f"Arquivo: {path} ({os.path.getsize(path) / 1024 ** 2:,.0f} MB)")
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        convert_seconds, feather_bytes = pool.submit(_convert_in_child, path).result()
+    print(f"Conversão para a cópia colunar: {convert_seconds:.1f}s ({feather_bytes / 1024 ** 2:,.0f} MB, uma vez)")
+
+    print("=" * 66)
+    print(f"{'modo':<9} {'leitura':>9} {'DataFrame':>12} {'pico RSS':>11} {'agregações':>12} {'ganho':>7}")
+    print("=" * 66)
+    baseline = None
+    for mode in LOADERS:
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            load_seconds, frame_mb, peak_rss_mb, query_seconds = pool.submit(
+                _load_in_child, path, mode
+            ).result()
+        baseline = baseline or frame_mb
+        print(f"{mode:<9} {load_seconds:>8.2f}s {frame_mb:>9,.0f} MB {peak_rss_mb:>8,.0f} MB "
+              f"{query_seconds:>11.2f}s {baseline / frame_mb:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
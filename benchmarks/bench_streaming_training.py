@@ -0,0 +1,91 @@
+"""
+Benchmark: treinamento out-of-core sobre um arquivo sintético grande
+Tech Challenge - Sistema Preditivo de Obesidade
+
+Gera (uma vez) um CSV sintético reamostrando as linhas reais com ruído nas
+variáveis contínuas, escrito em blocos, e treina cada modelo de
+src/streaming_training.py em um processo separado, medindo tempo, vazão,
+pico de memória (RSS máximo do processo) e acurácia na amostra de avaliação.
+
+Uso (a partir da raiz do projeto):
+    python benchmarks/bench_streaming_training.py --rows 10000000
+    python benchmarks/bench_streaming_training.py --rows 1000000 --models sgd hgb
+"""
+import argparse
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.streaming_training import STREAMING_MODELS, train_streaming
+
+NOISE = {'Age': 1.0, 'Height': 0.02, 'Weight': 2.0}
+
+
+def generate_file(source, path, n_rows, chunksize=1_000_000, seed=42):
+    """Escreve n_rows linhas sintéticas em blocos (memória limitada a um bloco)"""
+    base = pd.read_csv(source)
+    rng = np.random.default_rng(seed)
+    written = 0
+    while written < n_rows:
+        size = min(chunksize, n_rows - written)
+        chunk = base.iloc[rng.integers(0, len(base), size=size)].reset_index(drop=True)
+        for col, scale in NOISE.items():
+            chunk[col] = (chunk[col] + rng.normal(0, scale, size=size)).round(2)
+        chunk.to_csv(path, mode='w' if written == 0 else 'a', header=written == 0, index=False)
+        written += size
+        print(f"   {written:,}/{n_rows:,} linhas geradas")
+
+
+def _train_in_child(path, model_name, chunksize, sample_rows):
+    """Executa em processo próprio para medir o pico de memória isoladamente"""
+    start = time.perf_counter()
+    _, _, report = train_streaming(path, model_name, chunksize=chunksize,
+                                   sample_rows=sample_rows)
+    report['total_seconds'] = time.perf_counter() - start
+    # ru_maxrss está em KB no Linux
+    report['peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--models', nargs='+', choices=STREAMING_MODELS,
+                        default=list(STREAMING_MODELS))
+    parser.add_argument('--chunksize', type=int, default=200_000)
+    parser.add_argument('--sample-rows', type=int, default=500_000)
+    parser.add_argument('--path', default=None,
+                        help='Arquivo sintético (padrão: /tmp/obesity_<rows>.csv, reaproveitado)')
+    parser.add_argument('--data', default='data/obesity.csv')
+    args = parser.parse_args()
+
+    path = args.path or os.path.join('/tmp', f'obesity_{args.rows}.csv')
+    if not os.path.exists(path):
+        print(f"🔧 Gerando {path}...")
+        generate_file(args.data, path, args.rows)
+    print(f"Arquivo: {path} ({os.path.getsize(path) / 1024 ** 2:,.0f} MB)")
+
+    print("=" * 88)
+    print(f"{'modelo':<8} {'tempo':>9} {'linhas/s':>12} {'pico RSS':>11} "
+          f"{'estatísticas':>13} {'treino':>9} {'acurácia':>9} {'F1':>7}")
+    print("=" * 88)
+    for model_name in args.models:
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            report = pool.submit(_train_in_child, path, model_name, args.chunksize,
+                                 args.sample_rows).result()
+        throughput = report['rows_read'] / report['total_seconds']
+        print(f"{model_name:<8} {report['total_seconds']:>8.1f}s "
+              f"{throughput:>12,.0f} {report['peak_rss_mb']:>8,.0f} MB "
+              f"{report['stats_seconds']:>12.1f}s {report['train_seconds']:>8.1f}s "
+              f"{report['accuracy']:>9.4f} {report['f1_score']:>7.4f}")
+
+
+if __name__ == "__main__":
+    main()
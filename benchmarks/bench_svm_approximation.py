@@ -0,0 +1,95 @@
+"""
+Benchmark: SVC exato (probability=True) vs SVM RBF aproximado e calibrado
+Tech Challenge - Sistema Preditivo de Obesidade
+
+Reamostra as linhas reais (com ruído nas variáveis contínuas) até cada
+tamanho pedido e compara, no mesmo conjunto de teste:
+    exato      SVC(kernel='rbf', probability=True): Platt interno em 5 folds e
+               predição O(vetores de suporte) por linha
+    nystroem   candidato 'SVM' de train_model (Nystroem + LinearSVC, calibrado)
+    rff        o mesmo com random Fourier features (RBFSampler)
+Mede tempo de ajuste, tempo de predict_proba por 1000 linhas, F1 e número de
+vetores de suporte (exato). O SVC exato é pulado acima de --max-exact-rows.
+
+Uso (a partir da raiz do projeto):
+    python benchmarks/bench_svm_approximation.py --sizes 2111 10000 30000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.kernel_approximation import RBFSampler
+from sklearn.metrics import f1_score
+from sklearn.svm import SVC
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from data_preprocessing import DataPreprocessor, split_data
+from train_model import ModelTrainer
+
+NOISE = {'Age': 1.0, 'Height': 0.02, 'Weight': 2.0}
+
+
+def make_dataset(base, n_rows, seed=42):
+    """Reamostra as linhas reais com ruído nas variáveis contínuas"""
+    if n_rows <= len(base):
+        return base.head(n_rows).copy()
+    rng = np.random.default_rng(seed)
+    df = base.iloc[rng.integers(0, len(base), size=n_rows)].reset_index(drop=True)
+    for col, scale in NOISE.items():
+        df[col] = (df[col] + rng.normal(0, scale, size=n_rows)).round(2)
+    return df
+
+
+def make_candidates():
+    approximate = ModelTrainer().get_models_to_test()['SVM']
+    return {
+        'exato': SVC(kernel='rbf', probability=True, random_state=42),
+        'nystroem': approximate,
+        'rff': clone(approximate).set_params(
+            estimator__kernel=RBFSampler(gamma='scale', n_components=300, random_state=42)
+        )
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[2_111, 10_000, 30_000])
+    parser.add_argument('--max-exact-rows', type=int, default=30_000,
+                        help='Maior base em que o SVC exato é treinado')
+    parser.add_argument('--data', default='data/obesity.csv')
+    args = parser.parse_args()
+
+    base = pd.read_csv(args.data)
+    print("=" * 80)
+    print(f"{'linhas':>8} {'modelo':<10} {'ajuste':>10} {'predição/1k':>13} {'F1':>8} {'vetores sup.':>13}")
+    print("=" * 80)
+    for n_rows in args.sizes:
+        preprocessor = DataPreprocessor()
+        X, y = preprocessor.preprocess(make_dataset(base, n_rows), fit=True, scale=True)
+        X_train, X_test, y_train, y_test = split_data(X, y)
+        X_test = X_test.to_numpy()
+        for name, model in make_candidates().items():
+            if name == 'exato' and n_rows > args.max_exact_rows:
+                print(f"{n_rows:>8,} {name:<10} {'(pulado)':>10}")
+                continue
+            start = time.perf_counter()
+            model.fit(X_train.to_numpy(), y_train)
+            fit_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            y_proba = model.predict_proba(X_test)
+            predict_time = (time.perf_counter() - start) / len(X_test) * 1000
+            y_pred = model.classes_[y_proba.argmax(axis=1)]
+
+            n_support = model.n_support_.sum() if name == 'exato' else '-'
+            print(f"{n_rows:>8,} {name:<10} {fit_time:>9.2f}s {predict_time * 1000:>10.1f} ms "
+                  f"{f1_score(y_test, y_pred, average='weighted'):>8.4f} {n_support:>13}")
+
+
+if __name__ == "__main__":
+    main()
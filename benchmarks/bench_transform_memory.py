@@ -0,0 +1,87 @@
+"""
+Benchmark: pico de memória (tracemalloc) de preprocess vs modo de memória limitada
+Tech Challenge - Sistema Preditivo de Obesidade
+
+Replica o CSV real até cada tamanho pedido e mede, com tracemalloc, o pico
+de memória alocada durante a transformação (além da entrada) em:
+    preprocess        preprocess(fit=False): cópias do DataFrame a cada etapa
+    transform         DataPreprocessor.transform, texto como object
+    transform/cat     o mesmo com as colunas de texto como category
+    transform/out     category e buffer pré-alocado (out=)
+e confere o contrato de CompiledTransform: pico <= saída +
+MAX_TEMP_BYTES_PER_ROW bytes por linha de um bloco de BLOCK_ROWS linhas
+(a saída não conta com out=).
+
+Uso (a partir da raiz do projeto):
+    python benchmarks/bench_transform_memory.py --sizes 100000 1000000
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.data_preprocessing import CompiledTransform, DataPreprocessor
+
+# Tolerância fixa do contrato (tabelas de categorias, objetos do pandas)
+SLACK_BYTES = 1024 ** 2
+
+
+def traced_peak(func):
+    """Pico de memória alocada por func (bytes), sem contar o que já existia"""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--data', default='data/obesity.csv')
+    args = parser.parse_args()
+
+    base = pd.read_csv(args.data)
+    preprocessor = DataPreprocessor()
+    preprocessor.preprocess(base.copy(), fit=True, scale=True)
+    n_features = len(preprocessor.feature_names)
+
+    print("=" * 84)
+    print(f"{'linhas':>10} {'modo':<15} {'pico':>10} {'pico/saída':>11} "
+          f"{'extra':>10} {'entrada intacta':>16} {'contrato':>9}")
+    print("=" * 84)
+    for n_rows in args.sizes:
+        repeats = -(-n_rows // len(base))
+        df = pd.concat([base] * repeats, ignore_index=True).head(n_rows)
+        df_cat = df.astype({col: 'category' for col in df.select_dtypes('object').columns})
+        snapshot = df.copy()
+        output_bytes = n_rows * n_features * 4
+        buffer = preprocessor.compile().allocate(n_rows)
+
+        modes = {
+            'preprocess': (lambda: preprocessor.preprocess(df, fit=False, scale=True), True),
+            'transform': (lambda: preprocessor.transform(df), True),
+            'transform/cat': (lambda: preprocessor.transform(df_cat), True),
+            'transform/out': (lambda: preprocessor.transform(df_cat, out=buffer), False),
+        }
+        block_rows = min(n_rows, CompiledTransform.BLOCK_ROWS)
+        for name, (func, allocates_output) in modes.items():
+            peak = traced_peak(func)
+            extra = peak - (output_bytes if allocates_output else 0)
+            intact = df.equals(snapshot)
+            contract = '-' if name == 'preprocess' else (
+                'ok' if extra <= CompiledTransform.MAX_TEMP_BYTES_PER_ROW * block_rows + SLACK_BYTES
+                else 'VIOLADO'
+            )
+            print(f"{n_rows:>10,} {name:<15} {peak / 1024 ** 2:>7.1f} MB "
+                  f"{peak / output_bytes:>10.2f}x {extra / 1024 ** 2:>7.1f} MB "
+                  f"{str(intact):>16} {contract:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: predict_proba do sklearn vs avaliador de árvores achatadas
+Tech Challenge - Sistema Preditivo de Obesidade
+
+Uso (a partir da raiz do projeto):
+    python benchmarks/bench_tree_ensemble.py --sizes 1 10 100 1000 10000 100000 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.load_model import load_trained_model, load_preprocessor
+from src.fast_predictor import FastPredictor
+from src.tree_export import FlatTreeEnsemble
+
+
+def best_time(func, repeat):
+    """Menor tempo entre repeat execuções (em segundos)"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def make_batch(X_data, n_rows, seed=42):
+    """Reamostra as linhas reais (já pré-processadas) até n_rows"""
+    rng = np.random.default_rng(seed)
+    return X_data[rng.integers(0, len(X_data), size=n_rows)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[1, 10, 100, 1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument('--model', default='models/obesity_model.joblib')
+    parser.add_argument('--preprocessor', default='models/preprocessor.joblib')
+    parser.add_argument('--data', default='data/obesity.csv')
+    args = parser.parse_args()
+
+    model = load_trained_model(args.model)
+    predictor = FastPredictor(model, load_preprocessor(args.preprocessor), n_jobs=1)
+    parallel_predictor = FastPredictor(model, load_preprocessor(args.preprocessor))
+    X_data = predictor.transform_frame(pd.read_csv(args.data))
+
+    start = time.perf_counter()
+    flat = FlatTreeEnsemble.from_sklearn(model)
+    print(f"Exportação: {flat.n_trees} árvores, {flat.n_nodes:,} nós, "
+          f"profundidade {flat.max_depth} ({time.perf_counter() - start:.2f}s)")
+
+    print("=" * 78)
+    print(f"{'linhas':>10} {'sklearn n_jobs=1':>18} {'sklearn n_jobs=-1':>18} "
+          f"{'achatado':>12} {'ganho':>8} {'idêntico':>9}")
+    print("=" * 78)
+    for n_rows in args.sizes:
+        X = make_batch(X_data, n_rows)
+        repeat = 5 if n_rows <= 10_000 else 1
+
+        expected = predictor.predict_proba_array(X)
+        identical = np.array_equal(expected, flat.predict_proba(X))
+
+        serial = best_time(lambda: predictor.predict_proba_array(X), repeat)
+        parallel = best_time(lambda: parallel_predictor.predict_proba_array(X), repeat)
+        flat_time = best_time(lambda: flat.predict_proba(X), repeat)
+        print(f"{n_rows:>10,} {serial * 1000:>15.2f} ms {parallel * 1000:>15.2f} ms "
+              f"{flat_time * 1000:>9.2f} ms {serial / flat_time:>7.1f}x {str(identical):>9}")
+
+
+if __name__ == "__main__":
+    main()
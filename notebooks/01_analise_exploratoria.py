@@ -2,6 +2,9 @@
 Análise Exploratória de Dados (EDA)
 Tech Challenge - Sistema Preditivo de Obesidade
 """
+import os
+import sys
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
@@ -10,6 +13,10 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.schema import read_dataset
+
 # Configurações
 plt.style.use('seaborn-v0_8')
 sns.set_palette("husl")
@@ -17,7 +24,7 @@ pd.set_option('display.max_columns', None)
 
 def load_data():
     """Carrega os dados"""
-    df = pd.read_csv('../data/obesity.csv')
+    df = read_dataset('../data/obesity.csv')
     return df
 
 def basic_info(df):
@@ -73,7 +80,7 @@ def categorical_analysis(df):
     print("ANÁLISE DE VARIÁVEIS CATEGÓRICAS")
     print("=" * 60)
     
-    categorical_cols = df.select_dtypes(include=['object']).columns.tolist()
+    categorical_cols = df.select_dtypes(include=['object', 'category']).columns.tolist()
     categorical_cols.remove('Obesity')  # Remover variável alvo
     
     for col in categorical_cols:
@@ -126,7 +133,6 @@ def main():
     return df
 
 if __name__ == "__main__":
-    import os
     os.makedirs('../dashboard/images', exist_ok=True)
     df = main()
 
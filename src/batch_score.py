@@ -0,0 +1,229 @@
+"""
+Pontuação em lote de pacientes a partir de arquivos CSV/Parquet
+Tech Challenge - Sistema Preditivo de Obesidade
+
+Uso (a partir da raiz do projeto):
+    python -m src.batch_score data/obesity.csv --out scored.parquet --chunksize 50000
+    python -m src.batch_score registro.parquet --out scored.parquet --workers 8
+
+O arquivo de entrada é lido em blocos de tamanho fixo e cada bloco é
+pré-processado, pontuado e gravado antes do próximo ser lido, de modo que o
+uso de memória não depende do tamanho do arquivo. Com --workers N os blocos
+são distribuídos para um pool de processos e gravados na ordem de entrada.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from src.data_preprocessing import CompiledTransform
+from src.load_model import load_trained_model, load_preprocessor
+from src.fast_predictor import FastPredictor
+
+PREDICTION_COL = 'prediction'
+PROBA_PREFIX = 'proba_'
+
+
+def _file_format(path):
+    """Identifica o formato do arquivo pela extensão"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.parquet', '.pq'):
+        return 'parquet'
+    if ext == '.csv':
+        return 'csv'
+    raise ValueError(f"Formato não suportado: {path} (use .csv ou .parquet)")
+
+
+def iter_chunks(path, chunksize):
+    """Lê o arquivo de entrada em blocos de até chunksize linhas"""
+    if _file_format(path) == 'csv':
+        yield from pd.read_csv(path, chunksize=chunksize)
+    else:
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+
+
+class ChunkWriter:
+    """Grava os blocos pontuados de forma incremental (CSV ou Parquet)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.format = _file_format(path)
+        self._parquet_writer = None
+        self._csv_header = True
+
+    def write(self, df):
+        if self.format == 'csv':
+            df.to_csv(self.path, mode='w' if self._csv_header else 'a',
+                      header=self._csv_header, index=False)
+            self._csv_header = False
+            return
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._parquet_writer is None:
+            self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+        else:
+            # Blocos diferentes podem inferir tipos diferentes (ex.: int vs float)
+            table = table.cast(self._parquet_writer.schema)
+        self._parquet_writer.write_table(table)
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def score_chunk(chunk, predictor, transform=None, out=None):
+    """
+    Adiciona a classe prevista e as probabilidades por classe ao bloco
+
+    Com transform (CompiledTransform), o bloco é pré-processado em uma única
+    passada para o buffer float32 out, reaproveitado entre os blocos.
+    """
+    if transform is not None:
+        probabilities = predictor.predict_proba_array(transform(chunk, out=out))
+    else:
+        probabilities = predictor.predict_proba_frame(chunk)
+    scored = chunk.copy()
+    scored[PREDICTION_COL] = predictor.classes[probabilities.argmax(axis=1)]
+    for i, cls in enumerate(predictor.classes):
+        scored[f'{PROBA_PREFIX}{cls}'] = probabilities[:, i]
+    return scored
+
+
+# Preditor, transformação e buffer de cada processo do pool (criados uma única vez por worker)
+_worker_predictor = None
+_worker_transform = None
+_worker_buffer = None
+
+
+def _init_worker(model_path, preprocessor_path, chunksize):
+    """
+    Inicializa um worker do pool: carrega o modelo uma única vez.
+
+    O modelo é aberto com mmap_mode='r', de modo que os arrays NumPy do
+    artefato são lidos do page cache do sistema operacional, compartilhado
+    entre os processos. Estruturas que o sklearn copia ao desserializar (como
+    os nós das árvores) continuam privadas a cada worker.
+    Cada worker roda o modelo com n_jobs=1: o paralelismo vem do pool.
+    """
+    global _worker_predictor, _worker_transform, _worker_buffer
+    model = load_trained_model(model_path, mmap_mode='r')
+    preprocessor_data = load_preprocessor(preprocessor_path)
+    _worker_predictor = FastPredictor(model, preprocessor_data, n_jobs=1)
+    _worker_transform = CompiledTransform.from_preprocessor_data(preprocessor_data)
+    _worker_buffer = _worker_transform.allocate(chunksize)
+
+
+def _score_chunk_in_worker(chunk):
+    return score_chunk(chunk, _worker_predictor, _worker_transform, _worker_buffer)
+
+
+def _iter_scored_parallel(chunks, workers, chunksize, model_path, preprocessor_path):
+    """
+    Pontua os blocos em um pool de processos, preservando a ordem de entrada.
+
+    No máximo 2 * workers blocos ficam em processamento ao mesmo tempo, o que
+    mantém a memória limitada mesmo quando a escrita é mais lenta que a leitura.
+    """
+    max_pending = 2 * workers
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(model_path, preprocessor_path, chunksize)) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_score_chunk_in_worker, chunk))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def score_file(input_path, output_path, chunksize=50_000, workers=1,
+               model_path='models/obesity_model.joblib',
+               preprocessor_path='models/preprocessor.joblib'):
+    """
+    Pontua um arquivo inteiro bloco a bloco
+
+    Args:
+        input_path: Arquivo CSV/Parquet com as 16 variáveis de entrada
+        output_path: Arquivo CSV/Parquet de saída
+        chunksize: Número de linhas por bloco
+        workers: Número de processos (1 pontua no processo atual)
+        model_path: Caminho do modelo treinado
+        preprocessor_path: Caminho do pré-processador
+
+    Returns:
+        Total de linhas pontuadas
+    """
+    chunks = iter_chunks(input_path, chunksize)
+    if workers > 1:
+        scored_chunks = _iter_scored_parallel(chunks, workers, chunksize,
+                                              model_path, preprocessor_path)
+    else:
+        model = load_trained_model(model_path)
+        preprocessor_data = load_preprocessor(preprocessor_path)
+        predictor = FastPredictor(model, preprocessor_data)
+        transform = CompiledTransform.from_preprocessor_data(preprocessor_data)
+        buffer = transform.allocate(chunksize)
+        scored_chunks = (score_chunk(chunk, predictor, transform, buffer) for chunk in chunks)
+
+    total_rows = 0
+    start = time.perf_counter()
+    with ChunkWriter(output_path) as writer:
+        for scored in scored_chunks:
+            writer.write(scored)
+            total_rows += len(scored)
+            elapsed = time.perf_counter() - start
+            print(f"   {total_rows:,} linhas pontuadas ({total_rows / elapsed:,.0f} linhas/s)")
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ {total_rows:,} linhas pontuadas em {elapsed:.2f}s "
+          f"({total_rows / max(elapsed, 1e-9):,.0f} linhas/s)")
+    print(f"   Arquivo salvo em: {output_path}")
+    return total_rows
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Pontua pacientes em lote usando o modelo treinado"
+    )
+    parser.add_argument('input', help='Arquivo de entrada (.csv ou .parquet)')
+    parser.add_argument('--out', required=True, help='Arquivo de saída (.csv ou .parquet)')
+    parser.add_argument('--chunksize', type=int, default=50_000,
+                        help='Linhas por bloco (padrão: 50000)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Número de processos para pontuar os blocos (padrão: 1)')
+    parser.add_argument('--model', default='models/obesity_model.joblib',
+                        help='Caminho do modelo treinado')
+    parser.add_argument('--preprocessor', default='models/preprocessor.joblib',
+                        help='Caminho do pré-processador')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Função principal"""
+    args = parse_args(argv)
+    try:
+        score_file(args.input, args.out, chunksize=args.chunksize, workers=args.workers,
+                   model_path=args.model, preprocessor_path=args.preprocessor)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"❌ Erro: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Formato compacto do modelo em precisão reduzida, mapeável em memória
+Tech Challenge - Sistema Preditivo de Obesidade
+
+O artefato é um único arquivo binário: um cabeçalho JSON (metadados e
+posição de cada array) seguido pelos arrays alinhados em 64 bytes. A carga é
+um np.memmap + views, sem desserialização via pickle:
+
+    thresholds   float32 (arredondados para baixo: x <= t32 equivale a x <= t64
+                 para x float32, então a troca não altera nenhuma decisão)
+    índices      int16 quando cabem, senão int32
+    folhas       uint8 (probabilidades * 255 ou afim para gradient boosting)
+                 ou float16
+
+Uso (a partir da raiz do projeto):
+    python -m src.compact_model export --out models/obesity_model.compact
+    python -m src.compact_model compare --compact models/obesity_model.compact
+"""
+import argparse
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+
+from src.load_model import load_trained_model, load_preprocessor
+from src.fast_predictor import FastPredictor
+from src.schema import DTYPES, TARGET_COL, read_dataset
+from src.tree_export import FlatTreeEnsemble
+
+MAGIC = b'OBCM'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+
+def _smallest_index_dtype(max_value):
+    return np.int16 if max_value <= np.iinfo(np.int16).max else np.int32
+
+
+def _float32_floor(values):
+    """Maior float32 <= cada valor float64 (preserva as comparações x <= t)"""
+    rounded = values.astype(np.float32)
+    too_big = rounded.astype(np.float64) > values
+    rounded[too_big] = np.nextafter(rounded[too_big], np.float32(-np.inf))
+    return rounded
+
+
+def _quantize_leaves(flat, leaf_dtype):
+    """Retorna (values, value_scale, value_offset) na precisão pedida"""
+    if leaf_dtype == 'float16':
+        return flat.values.astype(np.float16), None, 0.0
+    if leaf_dtype != 'uint8':
+        raise ValueError(f"leaf_dtype inválido: {leaf_dtype} (use 'uint8' ou 'float16')")
+
+    if flat.kind == 'forest':
+        # Probabilidades em [0, 1] -> 0..255
+        return np.rint(flat.values * 255).astype(np.uint8), 1 / 255, 0.0
+
+    # Gradient boosting: valores com sinal, quantização afim min..max -> 0..255
+    low, high = float(flat.values.min()), float(flat.values.max())
+    scale = (high - low) / 255 if high > low else 1.0
+    quantized = np.rint((flat.values - low) / scale).astype(np.uint8)
+    return quantized, scale, low
+
+
+def save_compact_model(model, path='models/obesity_model.compact', leaf_dtype='uint8'):
+    """
+    Exporta um ensemble de árvores treinado para o formato compacto
+
+    Args:
+        model: RandomForest/ExtraTrees/GradientBoosting treinado
+        path: Arquivo de saída
+        leaf_dtype: 'uint8' ou 'float16' para os valores das folhas
+    """
+    flat = FlatTreeEnsemble.from_sklearn(model)
+    values, value_scale, value_offset = _quantize_leaves(flat, leaf_dtype)
+    index_dtype = _smallest_index_dtype(flat.n_nodes)
+
+    arrays = {
+        'feature': flat.feature.astype(_smallest_index_dtype(int(flat.feature.max()))),
+        'threshold': _float32_floor(flat.threshold),
+        'left': flat.left.astype(index_dtype),
+        'roots': flat.roots.astype(index_dtype),
+        'missing_left': flat.missing_left.astype(np.uint8),
+        'is_leaf': flat.is_leaf.astype(np.uint8),
+        'values': values
+    }
+    if flat.kind == 'gradient_boosting':
+        arrays['init_raw'] = flat.init_raw
+        arrays['tree_class'] = flat.tree_class.astype(np.int16)
+
+    header = {
+        'version': FORMAT_VERSION,
+        'kind': flat.kind,
+        'classes': [str(c) for c in flat.classes],
+        'max_depth': flat.max_depth,
+        'learning_rate': flat.learning_rate,
+        'value_scale': value_scale,
+        'value_offset': value_offset,
+        'arrays': {}
+    }
+    # Offsets relativos ao início da área de dados (após o cabeçalho)
+    offset = 0
+    for name, array in arrays.items():
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        header['arrays'][name] = {
+            'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset
+        }
+        offset += array.nbytes
+
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = -(-(len(MAGIC) + 4 + len(header_bytes)) // ALIGNMENT) * ALIGNMENT
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(np.uint32(len(header_bytes)).tobytes())
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(data_start + header['arrays'][name]['offset'])
+            f.write(np.ascontiguousarray(array).tobytes())
+    print(f"✅ Modelo compacto salvo em {path} ({os.path.getsize(path) / 1024:,.1f} KB)")
+    return path
+
+
+def load_compact_model(path='models/obesity_model.compact'):
+    """Mapeia o artefato compacto em memória e retorna um FlatTreeEnsemble"""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Modelo compacto não encontrado em {path}. Execute 'python -m src.compact_model export'.")
+
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} não é um modelo compacto válido")
+        header_len = int(np.frombuffer(f.read(4), dtype=np.uint32)[0])
+        header = json.loads(f.read(header_len))
+    if header['version'] != FORMAT_VERSION:
+        raise ValueError(f"Versão do formato não suportada: {header['version']}")
+
+    data_start = -(-(len(MAGIC) + 4 + header_len) // ALIGNMENT) * ALIGNMENT
+    buffer = np.memmap(path, dtype=np.uint8, mode='r')
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape']))
+        start = data_start + spec['offset']
+        arrays[name] = buffer[start:start + count * dtype.itemsize].view(dtype).reshape(spec['shape'])
+
+    return FlatTreeEnsemble(
+        kind=header['kind'], classes=header['classes'],
+        feature=arrays['feature'], threshold=arrays['threshold'], left=arrays['left'],
+        missing_left=arrays['missing_left'].view(bool), is_leaf=arrays['is_leaf'].view(bool),
+        values=arrays['values'], roots=arrays['roots'], max_depth=header['max_depth'],
+        learning_rate=header['learning_rate'], init_raw=arrays.get('init_raw'),
+        tree_class=arrays.get('tree_class'),
+        value_scale=header['value_scale'], value_offset=header['value_offset']
+    )
+
+
+def compare_with_original(model_path, compact_path, preprocessor_path, data_path, repeat=5):
+    """
+    Compara o artefato compacto com o modelo original (joblib)
+
+    Returns:
+        Dicionário com tamanhos, tempos de carga, concordância e delta de acurácia
+    """
+    def best_load_time(load):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            load()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    model = load_trained_model(model_path)
+    compact = load_compact_model(compact_path)
+    predictor = FastPredictor(model, load_preprocessor(preprocessor_path), n_jobs=1)
+    # Só as colunas de entrada do modelo e o alvo
+    columns = [col for col in predictor.feature_names if col in DTYPES] + [TARGET_COL]
+    df = read_dataset(data_path, columns=columns)
+    y = df.pop(TARGET_COL).to_numpy()
+    X = predictor.transform_frame(df)
+
+    original_proba = predictor.predict_proba_array(X)
+    compact_proba = compact.predict_proba(X)
+    original_labels = predictor.classes[original_proba.argmax(axis=1)]
+    compact_labels = compact.classes[compact_proba.argmax(axis=1)]
+
+    report = {
+        'size_original_kb': os.path.getsize(model_path) / 1024,
+        'size_compact_kb': os.path.getsize(compact_path) / 1024,
+        'load_original_ms': best_load_time(lambda: joblib.load(model_path)) * 1000,
+        'load_compact_ms': best_load_time(lambda: load_compact_model(compact_path)) * 1000,
+        'agreement': float((original_labels == compact_labels).mean()),
+        'max_abs_proba_diff': float(np.abs(original_proba - compact_proba).max())
+    }
+    report['accuracy_original'] = float((original_labels == y).mean())
+    report['accuracy_compact'] = float((compact_labels == y).mean())
+    report['accuracy_delta'] = report['accuracy_compact'] - report['accuracy_original']
+    return report
+
+
+def main(argv=None):
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Formato compacto do modelo")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help='Exporta o modelo para o formato compacto')
+    export_parser.add_argument('--out', default='models/obesity_model.compact')
+    export_parser.add_argument('--leaf-dtype', choices=['uint8', 'float16'], default='uint8')
+
+    compare_parser = subparsers.add_parser('compare', help='Compara com o modelo original')
+    compare_parser.add_argument('--compact', default='models/obesity_model.compact')
+    compare_parser.add_argument('--preprocessor', default='models/preprocessor.joblib')
+    compare_parser.add_argument('--data', default='data/obesity.csv')
+
+    for sub in (export_parser, compare_parser):
+        sub.add_argument('--model', default='models/obesity_model.joblib')
+    args = parser.parse_args(argv)
+
+    if args.command == 'export':
+        save_compact_model(load_trained_model(args.model), args.out, args.leaf_dtype)
+        return
+
+    report = compare_with_original(args.model, args.compact, args.preprocessor, args.data)
+    print("=" * 60)
+    print("MODELO COMPACTO x ORIGINAL")
+    print("=" * 60)
+    print(f"Tamanho: {report['size_original_kb']:,.1f} KB -> {report['size_compact_kb']:,.1f} KB "
+          f"({report['size_original_kb'] / report['size_compact_kb']:.1f}x menor)")
+    print(f"Carga:   {report['load_original_ms']:,.2f} ms -> {report['load_compact_ms']:,.2f} ms")
+    print(f"Concordância de classe: {report['agreement']:.2%}")
+    print(f"Maior diferença de probabilidade: {report['max_abs_proba_diff']:.4f}")
+    print(f"Acurácia: {report['accuracy_original']:.2%} -> {report['accuracy_compact']:.2%} "
+          f"(delta {report['accuracy_delta']:+.2%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Validação cruzada com reaproveitamento dos modelos de cada fold
+Tech Challenge - Sistema Preditivo de Obesidade
+
+Uma única chamada a cross_validate(return_estimator=True) devolve os modelos
+de cada fold, as métricas por fold e os índices de teste; com eles montamos as
+predições out-of-fold sem nenhum ajuste extra. Opcionalmente os modelos dos
+folds viram o modelo final (média das probabilidades), dispensando o refit no
+conjunto de treino completo.
+"""
+import numpy as np
+from sklearn.ensemble import VotingClassifier
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
+from sklearn.model_selection import StratifiedKFold, cross_validate
+from sklearn.preprocessing import LabelEncoder
+from sklearn.utils import Bunch
+
+SCORING = {
+    'accuracy': 'accuracy',
+    'f1_score': 'f1_weighted',
+    'precision': 'precision_weighted',
+    'recall': 'recall_weighted'
+}
+
+
+def build_fold_ensemble(fold_models, X_train=None):
+    """
+    Monta um VotingClassifier (voto suave) com modelos já treinados
+
+    O objeto é preenchido diretamente com os atributos de um VotingClassifier
+    ajustado, então é serializável e carregável sem nenhuma classe própria.
+    """
+    names = [f'fold_{i}' for i in range(len(fold_models))]
+    ensemble = VotingClassifier(list(zip(names, fold_models)), voting='soft')
+    ensemble.estimators_ = list(fold_models)
+    ensemble.named_estimators_ = Bunch(**dict(zip(names, fold_models)))
+    ensemble.le_ = LabelEncoder().fit(fold_models[0].classes_)
+    ensemble.classes_ = ensemble.le_.classes_
+    if hasattr(X_train, 'columns'):
+        ensemble.feature_names_in_ = np.asarray(X_train.columns, dtype=object)
+    return ensemble
+
+
+def cross_validate_once(model, X_train, y_train, cv=5):
+    """
+    Executa a validação cruzada uma única vez e extrai tudo dela
+
+    Returns:
+        Dicionário com fold_models, oof_pred (predições out-of-fold),
+        cv_scores (acurácia por fold), cv_<métrica> (média por fold),
+        oof_<métrica> (sobre as predições out-of-fold), fit_time (soma dos
+        ajustes dos folds) e n_fits
+    """
+    y_train = np.asarray(y_train)
+    output = cross_validate(
+        model, X_train, y_train,
+        cv=StratifiedKFold(n_splits=cv),
+        scoring=SCORING,
+        return_estimator=True,
+        return_indices=True
+    )
+
+    fold_models = output['estimator']
+    oof_pred = np.empty(len(y_train), dtype=y_train.dtype)
+    for fold_model, test_idx in zip(fold_models, output['indices']['test']):
+        X_fold = X_train.iloc[test_idx] if hasattr(X_train, 'iloc') else X_train[test_idx]
+        oof_pred[test_idx] = fold_model.predict(X_fold)
+
+    result = {
+        'fold_models': fold_models,
+        'oof_pred': oof_pred,
+        'cv_scores': output['test_accuracy'],
+        'fit_time': output['fit_time'].sum(),
+        'n_fits': len(fold_models)
+    }
+    for name in SCORING:
+        result[f'cv_{name}'] = output[f'test_{name}'].mean()
+    result['oof_accuracy'] = accuracy_score(y_train, oof_pred)
+    result['oof_f1_score'] = f1_score(y_train, oof_pred, average='weighted')
+    result['oof_precision'] = precision_score(y_train, oof_pred, average='weighted')
+    result['oof_recall'] = recall_score(y_train, oof_pred, average='weighted')
+    return result
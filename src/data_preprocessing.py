@@ -6,20 +6,207 @@ import pandas as pd
 import numpy as np
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.model_selection import train_test_split
+import hashlib
 import joblib
+import json
 import os
 
+try:
+    from src import schema
+except ImportError:
+    # Executado como script a partir de src/ (ex.: python src/train_model.py)
+    import schema
+
+# Código de categorias não vistas no caminho nativo: o HistGradientBoosting
+# trata códigos negativos como faltantes
+NATIVE_UNKNOWN_CODE = -1
+
+class CompiledTransform:
+    """
+    Transformação fundida de um DataPreprocessor já ajustado
+    
+    Vai das colunas brutas direto para uma matriz float32 pré-alocada, em uma
+    única passada por coluna: imputação, codificação das categóricas, IMC e
+    normalização (x * inv_scale + offset) escritos no destino, sem
+    DataFrames intermediários. Faltantes recebem os valores de imputação do
+    treino (fill_values: moda/mediana; na falta deles, a média do scaler) e
+    categorias não vistas recebem unknown_code, como em
+    encode_categorical(fit=False). Com native_categories (caminho nativo de
+    preprocess_native) os códigos saem dessas tabelas.
+    
+    A saída é float32: para o modelo nativo, entradas float64 arredondadas
+    podem cruzar um limiar das árvores (diferença de até ~4e-3 nas
+    probabilidades no holdout; ~4e-6 com as colunas float32 do esquema).
+    
+    Contrato de memória (n = linhas do lote):
+        - o DataFrame de entrada não é copiado nem alterado;
+        - a saída é a única alocação proporcional a n (n × n_features × 4
+          bytes), e nenhuma quando out= é informado;
+        - as linhas são processadas em blocos de BLOCK_ROWS, e os temporários
+          de um bloco (uma coluna float64 de rascunho reaproveitada, códigos
+          de uma coluna de texto, máscaras) somam no máximo
+          MAX_TEMP_BYTES_PER_ROW bytes por linha do bloco: o pico além da
+          saída é limitado (~4 MB), independente de n e do número de features.
+          Colunas category são as mais baratas: a consulta é feita uma vez por
+          categoria e os códigos das linhas vão direto para o rascunho.
+    """
+    
+    BLOCK_ROWS = 65_536
+    # Rascunho float64 (8) + códigos de uma coluna object e o índice de
+    # consulta do pandas (~40) + máscaras booleanas (~3)
+    MAX_TEMP_BYTES_PER_ROW = 64
+    
+    def __init__(self, label_encoders, scaler, feature_names, scale=True, unknown_code=0,
+                 fill_values=None, native_categories=None):
+        self.feature_names = list(feature_names)
+        self.unknown_code = unknown_code
+        self.category_tables = {col: pd.Index(le.classes_) for col, le in label_encoders.items()}
+        self.category_tables.update(
+            {col: pd.Index(categories) for col, categories in (native_categories or {}).items()}
+        )
+        mean = np.asarray(scaler.mean_, dtype=np.float64)
+        if scale:
+            self.inv_scale = 1.0 / np.asarray(scaler.scale_, dtype=np.float64)
+            self.offset = -mean * self.inv_scale
+        else:
+            self.inv_scale = np.ones(len(self.feature_names))
+            self.offset = np.zeros(len(self.feature_names))
+        self.fill_values = dict(zip(self.feature_names, mean))
+        self.fill_values.update(fill_values or {})
+        # Código da moda de treino de cada categórica (-1 se não houver)
+        self.fill_codes = {
+            col: table.get_indexer([str(self.fill_values.get(col))])[0]
+            for col, table in self.category_tables.items()
+        }
+        self._bmi_idx = (
+            self.feature_names.index('BMI') if 'BMI' in self.feature_names else None
+        )
+    
+    @classmethod
+    def from_preprocessor_data(cls, preprocessor_data, unknown_code=0):
+        """
+        Compila a partir do dicionário salvo em preprocessor.joblib
+
+        Sem normalização (modelo nativo), usa as tabelas native_categories e
+        NATIVE_UNKNOWN_CODE para categorias não vistas, como preprocess_native.
+        """
+        scale = preprocessor_data.get('scale_features', True)
+        return cls(preprocessor_data['label_encoders'], preprocessor_data['scaler'],
+                   preprocessor_data['feature_names'],
+                   scale=scale,
+                   unknown_code=unknown_code if scale else NATIVE_UNKNOWN_CODE,
+                   fill_values=preprocessor_data.get('fill_values'),
+                   native_categories=preprocessor_data.get('native_categories'))
+    
+    def allocate(self, n_rows):
+        """Buffer float32 para n_rows linhas, reutilizável via out="""
+        return np.empty((n_rows, len(self.feature_names)), dtype=np.float32)
+    
+    def _numeric(self, df, col, out):
+        """Coluna numérica (ausentes preenchidos) copiada para out"""
+        values = df[col]
+        if values.dtype == object:
+            values = pd.to_numeric(values, errors='coerce')
+        np.copyto(out, values.to_numpy(), casting='unsafe')
+        missing = np.isnan(out)
+        if missing.any():
+            out[missing] = self.fill_values[col]
+        return out
+    
+    def _bmi(self, df, out):
+        """IMC (Weight / Height²) escrito em out, com os ausentes preenchidos antes"""
+        np.copyto(out, df['Weight'].to_numpy(), casting='unsafe')
+        height = df['Height'].to_numpy()
+        out /= height
+        out /= height
+        missing = np.isnan(out)
+        if missing.any():
+            weight = df['Weight'].to_numpy()[missing].astype(np.float64)
+            height = height[missing].astype(np.float64)
+            weight[np.isnan(weight)] = self.fill_values['Weight']
+            height[np.isnan(height)] = self.fill_values['Height']
+            out[missing] = weight / (height * height)
+        return out
+    
+    def _codes(self, df, col, out):
+        """Códigos da coluna categórica (como em encode_categorical) escritos em out"""
+        values = df[col]
+        table = self.category_tables[col]
+        fill_code = self.fill_codes[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Uma consulta por categoria, não por linha; o código -1 (ausente)
+            # cai, com mode='wrap', no código de preenchimento acrescentado ao final
+            lookup = np.append(table.get_indexer(values.cat.categories.astype(str)), fill_code)
+            lookup = np.where(lookup < 0, self.unknown_code, lookup).astype(np.float64)
+            return np.take(lookup, values.cat.codes.to_numpy(), out=out, mode='wrap')
+        
+        codes = table.get_indexer(values.to_numpy())
+        if values.hasnans:
+            codes[values.isna().to_numpy()] = fill_code
+        codes[codes < 0] = self.unknown_code
+        np.copyto(out, codes, casting='unsafe')
+        return out
+    
+    def __call__(self, df, out=None):
+        """
+        Transforma um DataFrame com as colunas brutas
+        
+        Args:
+            df: DataFrame com as variáveis de entrada (a coluna alvo é ignorada);
+                colunas de texto podem ser object ou category
+            out: Buffer float32 com pelo menos len(df) linhas (ex.: allocate);
+                reutilizado entre lotes para não alocar a cada chamada
+        
+        Returns:
+            Matriz float32 (len(df), n_features), uma visão de out quando informado
+        """
+        n_rows = len(df)
+        if out is None:
+            out = self.allocate(n_rows)
+        elif out.shape[0] < n_rows or out.shape[1] != len(self.feature_names):
+            raise ValueError(f"Buffer com formato {out.shape} não comporta "
+                             f"({n_rows}, {len(self.feature_names)})")
+        X = out[:n_rows]
+        
+        # Escala em float64 no rascunho e uma única conversão para float32 no destino
+        scratch = np.empty(min(n_rows, self.BLOCK_ROWS), dtype=np.float64)
+        for start in range(0, n_rows, self.BLOCK_ROWS):
+            stop = min(start + self.BLOCK_ROWS, n_rows)
+            block = df.iloc[start:stop]
+            block_scratch = scratch[:stop - start]
+            for i, col in enumerate(self.feature_names):
+                if i == self._bmi_idx:
+                    self._bmi(block, block_scratch)
+                elif col in self.category_tables:
+                    self._codes(block, col, block_scratch)
+                else:
+                    self._numeric(block, col, block_scratch)
+                block_scratch *= self.inv_scale[i]
+                np.add(block_scratch, self.offset[i], out=X[start:stop, i], casting='unsafe')
+        return X
+
 class DataPreprocessor:
     """Classe para pré-processamento dos dados"""
     
-    def __init__(self):
+    def __init__(self, unknown_code=0):
         self.label_encoders = {}
         self.scaler = StandardScaler()
         self.feature_names = None
+        # Código atribuído a categorias não vistas no treino
+        self.unknown_code = unknown_code
+        self._category_tables = {}
+        # Categorias por coluna do caminho nativo (preprocess_native)
+        self.native_categories = {}
+        # Valores de imputação do treino (moda das categóricas, mediana das numéricas)
+        self.fill_values = {}
+        # False quando o pré-processador carregado serve o modelo nativo
+        # (save_preprocessor(scale_features=False)): compile/transform seguem
+        # então preprocess_native
+        self.scale = True
         
     def load_data(self, filepath='data/obesity.csv'):
-        """Carrega os dados"""
-        df = pd.read_csv(filepath)
+        """Carrega os dados com os tipos de src/schema.py (category e float32)"""
+        df = schema.read_dataset(filepath)
         return df
     
     def create_bmi(self, df):
@@ -28,24 +215,39 @@ class DataPreprocessor:
             df['BMI'] = df['Weight'] / (df['Height'] ** 2)
         return df
     
-    def handle_missing_values(self, df):
-        """Trata valores faltantes"""
-        # Verificar valores faltantes
-        missing = df.isnull().sum()
-        if missing.sum() > 0:
-            print(f"Valores faltantes encontrados:\n{missing[missing > 0]}")
-            # Preencher com moda para categóricas e mediana para numéricas
-            for col in df.columns:
-                if df[col].isnull().sum() > 0:
-                    if df[col].dtype == 'object':
-                        df[col].fillna(df[col].mode()[0], inplace=True)
-                    else:
-                        df[col].fillna(df[col].median(), inplace=True)
-        return df
+    def handle_missing_values(self, df, fit=True):
+        """
+        Trata valores faltantes
+        
+        Com fit=True calcula a moda (categóricas) e a mediana (numéricas) de
+        cada coluna e as guarda em fill_values; com fit=False aplica os valores
+        guardados, sem estatísticas do lote (resultado independente do lote,
+        inclusive para uma única linha).
+        """
+        if fit:
+            # Verificar valores faltantes
+            missing = df.isnull().sum()
+            if missing.sum() > 0:
+                print(f"Valores faltantes encontrados:\n{missing[missing > 0]}")
+            # Moda para categóricas e mediana para numéricas
+            self.fill_values = {
+                col: df[col].median() if pd.api.types.is_numeric_dtype(df[col]) else df[col].mode()[0]
+                for col in df.columns if df[col].notna().any()
+            }
+        # Colunas category precisam ter o valor de preenchimento entre as categorias
+        missing_categories = {
+            col: df[col].cat.add_categories([value])
+            for col, value in self.fill_values.items()
+            if col in df.columns and isinstance(df[col].dtype, pd.CategoricalDtype)
+            and value not in df[col].cat.categories
+        }
+        if missing_categories:
+            df = df.assign(**missing_categories)
+        return df.fillna(self.fill_values)
     
     def encode_categorical(self, df, fit=True):
-        """Codifica variáveis categóricas"""
-        categorical_cols = df.select_dtypes(include=['object']).columns.tolist()
+        """Codifica variáveis categóricas (colunas object ou category)"""
+        categorical_cols = df.select_dtypes(include=['object', 'category']).columns.tolist()
         
         # Remover variável alvo se estiver presente
         if 'Obesity' in categorical_cols:
@@ -58,19 +260,25 @@ class DataPreprocessor:
                 self.label_encoders[col] = le
             else:
                 if col in self.label_encoders:
-                    # Para dados novos, usar transform existente
-                    # Valores não vistos serão tratados
-                    try:
-                        df[col] = self.label_encoders[col].transform(df[col].astype(str))
-                    except ValueError:
-                        # Se houver valor novo, usar o mais comum
-                        df[col] = df[col].map(
-                            lambda x: self.label_encoders[col].transform([x])[0] 
-                            if x in self.label_encoders[col].classes_ 
-                            else 0
-                        )
+                    # Para dados novos, usar a tabela categoria -> código
+                    # Valores não vistos recebem self.unknown_code
+                    codes = self._category_table(col).get_indexer(df[col].astype(str))
+                    df[col] = np.where(codes < 0, self.unknown_code, codes)
         return df
     
+    def _category_table(self, col):
+        """
+        Tabela hash categoria -> código para a coluna, pré-computada a partir
+        de classes_ do LabelEncoder (a posição em classes_ é o código).
+        Reconstruída apenas se o encoder da coluna for substituído.
+        """
+        le = self.label_encoders[col]
+        cached = self._category_tables.get(col)
+        if cached is None or cached[0] is not le:
+            cached = (le, pd.Index(le.classes_))
+            self._category_tables[col] = cached
+        return cached[1]
+    
     def prepare_features(self, df, target_col='Obesity'):
         """Prepara features e target"""
         # Criar IMC
@@ -107,7 +315,7 @@ class DataPreprocessor:
             scale: Se True, normaliza as features
         """
         # Tratar valores faltantes
-        df = self.handle_missing_values(df)
+        df = self.handle_missing_values(df, fit=fit)
         
         # Codificar categóricas
         df = self.encode_categorical(df, fit=fit)
@@ -121,14 +329,96 @@ class DataPreprocessor:
         
         return X, y
     
-    def save_preprocessor(self, filepath='models/preprocessor.joblib'):
-        """Salva o pré-processador"""
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        joblib.dump({
+    def preprocess_native(self, df, target_col='Obesity', fit=True):
+        """
+        Pré-processamento para modelos com suporte nativo a categóricas
+        (HistGradientBoosting), sem LabelEncoder nem StandardScaler
+        
+        As categóricas viram códigos inteiros via pd.Categorical, na mesma
+        ordem do LabelEncoder (categorias não vistas recebem -1, que o modelo
+        trata como faltante); as numéricas não são normalizadas. As tabelas
+        (native_categories) são salvas com save_preprocessor(scale_features=False),
+        e FastPredictor e CompiledTransform codificam da mesma forma.
+        """
+        df = self.handle_missing_values(df, fit=fit)
+        X, y = self.prepare_features(df, target_col=target_col)
+        
+        for col in X.select_dtypes(include=['object', 'category']).columns:
+            values = X[col].astype(str)
+            if fit:
+                self.native_categories[col] = np.sort(values.unique())
+            X[col] = pd.Categorical(values, categories=self.native_categories[col]).codes
+        
+        return X, y
+    
+    def transform(self, df, out=None, scale=None):
+        """
+        Modo de memória limitada de preprocess(fit=False) (ou de
+        preprocess_native(fit=False), sem normalização): não copia nem altera
+        df e faz uma única alocação (nenhuma com out=), em float32; o contrato
+        de pico de memória está em CompiledTransform
+        
+        Args:
+            scale: Normaliza as features (None: self.scale, o modo do
+                pré-processador carregado)
+        
+        Returns:
+            DataFrame float32 com as colunas feature_names e o índice de df,
+            sem cópia da matriz (uma visão de out quando informado)
+        """
+        X = self.compile(scale=scale)(df, out=out)
+        return pd.DataFrame(X, columns=self.feature_names, index=df.index, copy=False)
+    
+    def compile(self, scale=None):
+        """
+        Compila o pré-processador ajustado em uma transformação fundida
+        (CompiledTransform) equivalente a preprocess(fit=False) ou, sem
+        normalização, a preprocess_native(fit=False)
+        
+        Usa o mesmo dicionário de save_preprocessor e o mesmo caminho de
+        CompiledTransform.from_preprocessor_data (tabelas native_categories e
+        NATIVE_UNKNOWN_CODE sem normalização).
+        
+        Args:
+            scale: Normaliza as features (None: self.scale)
+        """
+        if self.feature_names is None or not hasattr(self.scaler, 'mean_'):
+            raise ValueError("Pré-processador não ajustado: execute preprocess(fit=True) "
+                             "ou load_preprocessor antes de compile")
+        scale = self.scale if scale is None else scale
+        return CompiledTransform.from_preprocessor_data(self.preprocessor_data(scale),
+                                                        unknown_code=self.unknown_code)
+    
+    def preprocessor_data(self, scale_features=True):
+        """
+        Dicionário salvo em preprocessor.joblib
+        
+        Args:
+            scale_features: False quando o modelo consome as features sem
+                normalização (caminho nativo de preprocess_native)
+        """
+        return {
             'label_encoders': self.label_encoders,
             'scaler': self.scaler,
-            'feature_names': self.feature_names
-        }, filepath)
+            'feature_names': self.feature_names,
+            'fill_values': self.fill_values,
+            'scale_features': scale_features,
+            # Tabelas de códigos do caminho nativo (só usadas sem normalização)
+            'native_categories': {} if scale_features else {
+                col: list(categories) for col, categories in self.native_categories.items()
+            }
+        }
+    
+    def save_preprocessor(self, filepath='models/preprocessor.joblib', scale_features=True):
+        """
+        Salva o pré-processador
+        
+        Args:
+            scale_features: False quando o modelo salvo consome as features sem
+                normalização (caminho nativo de preprocess_native)
+        """
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        joblib.dump(self.preprocessor_data(scale_features), filepath)
         print(f"✅ Pré-processador salvo em {filepath}")
     
     def load_preprocessor(self, filepath='models/preprocessor.joblib'):
@@ -137,7 +427,64 @@ class DataPreprocessor:
         self.label_encoders = preprocessor_data['label_encoders']
         self.scaler = preprocessor_data['scaler']
         self.feature_names = preprocessor_data['feature_names']
+        self.fill_values = preprocessor_data.get('fill_values', {})
+        self.scale = preprocessor_data.get('scale_features', True)
+        self.native_categories = {
+            col: np.asarray(categories)
+            for col, categories in preprocessor_data.get('native_categories', {}).items()
+        }
         print(f"✅ Pré-processador carregado de {filepath}")
+    
+    def save_cache(self, X, y, fingerprint, directory='models/preprocessed'):
+        """
+        Grava o resultado de preprocess (fit=True) para reuso: X e y em .npy
+        (mapeáveis em memória), encoders/scaler em preprocessor.joblib e a
+        impressão digital dos dados em cache.json, gravado por último
+        """
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, 'X.npy'), np.ascontiguousarray(X.to_numpy()))
+        np.save(os.path.join(directory, 'y.npy'), y.to_numpy().astype(str))
+        self.save_preprocessor(os.path.join(directory, 'preprocessor.joblib'))
+        with open(os.path.join(directory, 'cache.json'), 'w', encoding='utf-8') as f:
+            json.dump({'fingerprint': fingerprint, 'columns': list(X.columns),
+                       'target': y.name}, f)
+    
+    def load_cache(self, fingerprint, directory='models/preprocessed'):
+        """
+        Recarrega o resultado de preprocess gravado por save_cache
+        
+        Returns:
+            (X, y) com X mapeado em memória, ou None se não houver cache para
+            esta impressão digital (dados ou pré-processamento mudaram)
+        """
+        meta_path = os.path.join(directory, 'cache.json')
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta['fingerprint'] != fingerprint:
+            return None
+        
+        self.load_preprocessor(os.path.join(directory, 'preprocessor.joblib'))
+        X = pd.DataFrame(np.load(os.path.join(directory, 'X.npy'), mmap_mode='r'),
+                         columns=meta['columns'], copy=False)
+        y = pd.Series(np.load(os.path.join(directory, 'y.npy')).astype(object), name=meta['target'])
+        return X, y
+
+def data_fingerprint(filepath='data/obesity.csv'):
+    """
+    Impressão digital dos dados pré-processados: hash do CSV, do código deste
+    módulo e do esquema de tipos; muda sempre que o arquivo de dados, o
+    pré-processamento ou os tipos de leitura mudam
+    """
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    for source in (__file__, schema.__file__):
+        with open(source, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
 
 def split_data(X, y, test_size=0.2, random_state=42):
     """Divide os dados em treino e teste"""
@@ -0,0 +1,205 @@
+"""
+Caminho compilado de inferência (uma linha ou lotes)
+Tech Challenge - Sistema Preditivo de Obesidade
+"""
+import copy
+import numpy as np
+import pandas as pd
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.ensemble import VotingClassifier
+from sklearn.pipeline import Pipeline
+
+try:
+    from src.data_preprocessing import NATIVE_UNKNOWN_CODE
+except ImportError:
+    # Executado a partir de src/ (ex.: python src/train_model.py)
+    from data_preprocessing import NATIVE_UNKNOWN_CODE
+
+
+class FastPredictor:
+    """
+    Preditor pré-compilado a partir do pré-processador salvo.
+
+    Substitui o pipeline de DataFrame usado em make_prediction: o dicionário
+    de entrada vai direto para um vetor NumPy (lookup de categóricas em dict,
+    IMC calculado em linha e normalização fundida em uma multiplicação e uma
+    soma), e o modelo é avaliado uma única vez via predict_proba.
+    """
+
+    def __init__(self, model, preprocessor_data, unknown_code=0, n_jobs=None):
+        """
+        Args:
+            model: Modelo treinado (obesity_model.joblib)
+            preprocessor_data: Dicionário carregado de preprocessor.joblib
+            unknown_code: Código usado para categorias não vistas no treino
+                (no modelo nativo, sem normalização, é sempre NATIVE_UNKNOWN_CODE)
+            n_jobs: n_jobs do modelo nas predições em lote (None mantém o do modelo)
+        """
+        self.model = model
+        self.classes = model.classes_
+        self.feature_names = list(preprocessor_data['feature_names'])
+        scale = preprocessor_data.get('scale_features', True)
+        self.unknown_code = unknown_code if scale else NATIVE_UNKNOWN_CODE
+        # Valores de imputação do treino (ausentes na entrada)
+        self.fill_values = preprocessor_data.get('fill_values', {})
+
+        # Tabelas categoria -> código (equivalente ao LabelEncoder.transform, ou
+        # a preprocess_native com as tabelas native_categories)
+        categories = {col: le.classes_ for col, le in preprocessor_data['label_encoders'].items()}
+        categories.update(preprocessor_data.get('native_categories') or {})
+        self.category_maps = {
+            col: {value: code for code, value in enumerate(classes)}
+            for col, classes in categories.items()
+        }
+        # Mesmas tabelas como índice hash, para codificar lotes sem loop por linha
+        self._category_indexes = {col: pd.Index(classes) for col, classes in categories.items()}
+
+        # (x - mean) / scale  ==  x * inv_scale + offset
+        scaler = preprocessor_data['scaler']
+        self._inv_scale = 1.0 / np.asarray(scaler.scale_, dtype=np.float64)
+        self._offset = -np.asarray(scaler.mean_, dtype=np.float64) * self._inv_scale
+        if not scale:
+            # Modelo nativo (HistGradientBoosting): códigos e valores brutos
+            self._inv_scale = np.ones_like(self._inv_scale)
+            self._offset = np.zeros_like(self._offset)
+
+        self._bmi_idx = (
+            self.feature_names.index('BMI') if 'BMI' in self.feature_names else None
+        )
+        self._predictor = self._compile_model(model, n_jobs=1)
+        self._batch_predictor = self._compile_model(model, n_jobs=n_jobs)
+
+    @staticmethod
+    def _compile_model(model, n_jobs=None):
+        """
+        Cria uma cópia rasa do modelo para receber arrays já pré-processados.
+
+        A cópia compartilha os estimadores treinados, mas não tem
+        feature_names_in_, já que a entrada aqui é um array na ordem correta.
+        Com n_jobs=1 evita o custo de disparar threads para uma única amostra.
+        Ensembles de modelos completos (ex.: VotingClassifier dos folds), os
+        passos de um Pipeline e os modelos internos de um CalibratedClassifierCV
+        são compilados da mesma forma.
+        """
+        fast_model = copy.copy(model)
+        if n_jobs is not None and 'n_jobs' in fast_model.get_params(deep=False):
+            fast_model.set_params(n_jobs=n_jobs)
+        fast_model.__dict__.pop('feature_names_in_', None)
+        if getattr(fast_model, '_preprocessor', None) is not None:
+            # HistGradientBoosting com categóricas nativas: o ColumnTransformer
+            # interno (e seus encoders) também guarda os nomes das colunas
+            preprocessor = copy.copy(fast_model._preprocessor)
+            preprocessor.__dict__.pop('feature_names_in_', None)
+            preprocessor.transformers_ = [
+                (name, FastPredictor._compile_model(transformer), columns)
+                if hasattr(transformer, 'feature_names_in_') else (name, transformer, columns)
+                for name, transformer, columns in preprocessor.transformers_
+            ]
+            fast_model._preprocessor = preprocessor
+        if isinstance(fast_model, VotingClassifier):
+            fast_model.estimators_ = [
+                FastPredictor._compile_model(estimator, n_jobs) for estimator in fast_model.estimators_
+            ]
+        if isinstance(fast_model, Pipeline):
+            fast_model.steps = [
+                (name, FastPredictor._compile_model(step, n_jobs)) for name, step in fast_model.steps
+            ]
+        if isinstance(fast_model, CalibratedClassifierCV):
+            calibrated_classifiers = []
+            for calibrated in fast_model.calibrated_classifiers_:
+                calibrated = copy.copy(calibrated)
+                calibrated.estimator = FastPredictor._compile_model(calibrated.estimator, n_jobs)
+                calibrated_classifiers.append(calibrated)
+            fast_model.calibrated_classifiers_ = calibrated_classifiers
+        return fast_model
+
+    def _value(self, input_data, col):
+        """Valor de entrada, ou o valor de imputação do treino se ausente (None/NaN)"""
+        value = input_data.get(col)
+        if value is None or value != value:
+            value = self.fill_values.get(col)
+        return value
+
+    def transform(self, input_data, out=None):
+        """
+        Converte o dicionário de entrada no vetor de features normalizado;
+        altura não positiva (IMC infinito) gera ValueError
+        """
+        row = np.empty(len(self.feature_names)) if out is None else out
+        for i, col in enumerate(self.feature_names):
+            if i == self._bmi_idx:
+                continue
+            value = self._value(input_data, col)
+            mapping = self.category_maps.get(col)
+            if mapping is not None:
+                row[i] = mapping.get(value, self.unknown_code)
+            else:
+                row[i] = np.nan if value is None else value
+
+        if self._bmi_idx is not None:
+            height = self._value(input_data, 'Height')
+            if height <= 0:
+                raise ValueError(f"Altura inválida: {height} (deve ser positiva)")
+            row[self._bmi_idx] = self._value(input_data, 'Weight') / (height * height)
+
+        row *= self._inv_scale
+        row += self._offset
+        return row
+
+    def predict(self, input_data):
+        """
+        Faz a predição de um paciente
+
+        Returns:
+            Tupla (prediction, probabilities, classes), no mesmo formato de make_prediction
+        """
+        X = self.transform(input_data)[np.newaxis, :]
+        probabilities = self._predictor.predict_proba(X)[0]
+        prediction = self.classes[probabilities.argmax()]
+        return prediction, probabilities, self.classes
+
+    def _filled(self, df, col):
+        """Coluna do lote com os ausentes preenchidos pelos valores de treino"""
+        values = df[col]
+        if col in self.fill_values and values.hasnans:
+            values = values.fillna(self.fill_values[col])
+        return values
+
+    def transform_frame(self, df):
+        """Versão vetorizada de transform para um lote (DataFrame com as colunas brutas)"""
+        X = np.empty((len(df), len(self.feature_names)), dtype=np.float64)
+        for i, col in enumerate(self.feature_names):
+            if i == self._bmi_idx:
+                continue
+            index = self._category_indexes.get(col)
+            if index is not None:
+                codes = index.get_indexer(self._filled(df, col).astype(str))
+                X[:, i] = np.where(codes < 0, self.unknown_code, codes)
+            else:
+                X[:, i] = pd.to_numeric(self._filled(df, col), errors='coerce')
+
+        if self._bmi_idx is not None:
+            height = self._filled(df, 'Height').to_numpy(dtype=np.float64)
+            if (height <= 0).any():
+                raise ValueError(f"Altura inválida: {height[height <= 0][0]} (deve ser positiva)")
+            X[:, self._bmi_idx] = (self._filled(df, 'Weight').to_numpy(dtype=np.float64)
+                                   / (height * height))
+
+        X *= self._inv_scale
+        X += self._offset
+        return X
+
+    def predict_proba_frame(self, df):
+        """Probabilidades por classe para um lote, com uma chamada ao modelo"""
+        return self._batch_predictor.predict_proba(self.transform_frame(df))
+
+    def transform_records(self, records):
+        """Converte uma lista de dicionários de entrada na matriz de features normalizada"""
+        X = np.empty((len(records), len(self.feature_names)), dtype=np.float64)
+        for i, input_data in enumerate(records):
+            self.transform(input_data, out=X[i])
+        return X
+
+    def predict_proba_array(self, X):
+        """Probabilidades por classe para uma matriz já pré-processada"""
+        return self._batch_predictor.predict_proba(X)
@@ -0,0 +1,517 @@
+"""
+Busca de hiperparâmetros com motores plugáveis
+Tech Challenge - Sistema Preditivo de Obesidade
+
+Motores disponíveis (SEARCH_ENGINES):
+    grid       busca exaustiva (equivalente ao GridSearchCV original)
+    random     amostragem aleatória do espaço de busca
+    halving    successive halving: muitos candidatos com pouco recurso, só os
+               melhores recebem mais (recurso = n_estimators ou n_samples)
+    hyperband  vários brackets de successive halving com recursos iniciais
+               diferentes
+    warm_start florestas crescidas incrementalmente (warm_start): um único
+               modelo por configuração e fold é avaliado com 50/100/150/200
+               árvores, sem retreinar as primeiras
+
+Todos avaliam com a mesma validação cruzada e métrica e respeitam um
+orçamento de tempo total (budget_seconds): cada (candidato, fold) é um job
+separado e o orçamento é conferido antes de despachar cada um, então só os
+jobs já em execução (no máximo um por worker) terminam depois do prazo. Com
+um ResultsStore (store), grid, random e warm_start gravam o score de cada
+(candidato, fold) e uma busca interrompida é retomada de onde parou.
+
+Com o recurso n_samples (halving/hyperband em LogisticRegression e SVM), o
+melhor score é medido em uma subamostra (score_rows linhas no resultado) e
+não é comparável ao score da grade, medido em todas as linhas.
+"""
+import math
+import time
+
+import numpy as np
+from joblib import Parallel, delayed
+from scipy.stats import loguniform, randint
+from sklearn.base import clone
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import (
+    ParameterGrid, ParameterSampler, StratifiedKFold, train_test_split
+)
+from sklearn.utils import _safe_indexing
+
+from results_store import content_hash, estimator_params
+
+# Espaços de busca (distribuições) para cada modelo de models_to_test
+SEARCH_SPACES = {
+    'RandomForest': {
+        'n_estimators': [50, 100, 150, 200],
+        'max_depth': [10, 15, 20, 25, 30, None],
+        'min_samples_split': randint(2, 11),
+        'min_samples_leaf': randint(1, 5),
+        'max_features': ['sqrt', 'log2', None]
+    },
+    'GradientBoosting': {
+        'n_estimators': [50, 100, 150, 200],
+        'learning_rate': loguniform(0.01, 0.3),
+        'max_depth': randint(2, 8),
+        'subsample': [0.6, 0.8, 1.0],
+        'min_samples_leaf': randint(1, 5)
+    },
+    'LogisticRegression': {
+        'C': loguniform(1e-3, 1e3),
+        'class_weight': [None, 'balanced']
+    },
+    'SVM': {
+        'estimator__svm__C': loguniform(1e-1, 1e3),
+        'estimator__kernel__gamma': loguniform(1e-3, 1e0),
+        'estimator__kernel__n_components': [100, 200, 300, 500]
+    }
+}
+
+# Grades do motor 'grid' (a do RandomForest é a do GridSearchCV original)
+GRID_SPACES = {
+    'RandomForest': {
+        'n_estimators': [100, 200],
+        'max_depth': [15, 20, 25],
+        'min_samples_split': [2, 5, 10],
+        'min_samples_leaf': [1, 2, 4]
+    },
+    'GradientBoosting': {
+        'n_estimators': [100, 200],
+        'learning_rate': [0.05, 0.1, 0.2],
+        'max_depth': [3, 5, 7]
+    },
+    'LogisticRegression': {
+        'C': [0.01, 0.1, 1, 10, 100],
+        'class_weight': [None, 'balanced']
+    },
+    'SVM': {
+        'estimator__svm__C': [1, 10, 100],
+        'estimator__kernel__gamma': [None, 0.01, 0.02, 0.1]
+    }
+}
+
+# Recurso do successive halving: (parâmetro, mínimo, máximo); n_samples usa
+# os limites automáticos do sklearn
+RESOURCES = {
+    'RandomForest': ('n_estimators', 10, 200),
+    'GradientBoosting': ('n_estimators', 10, 200),
+    'LogisticRegression': ('n_samples', 'smallest', 'auto'),
+    'SVM': ('n_samples', 'smallest', 'auto')
+}
+
+# Pontos de avaliação do motor warm_start (número de árvores)
+WARM_START_STAGES = [50, 100, 150, 200]
+WARM_START_MODELS = ('RandomForest', 'GradientBoosting')
+
+
+def _out_of_budget(start, budget_seconds):
+    return budget_seconds is not None and time.perf_counter() - start >= budget_seconds
+
+
+def _new_result(engine):
+    return {'engine': engine, 'best_params': None, 'best_score': -np.inf, 'score_rows': None,
+            'n_fits': 0, 'n_trees': 0, 'elapsed': 0.0, 'trace': []}
+
+
+def _record(result, start, best_score, best_params, n_fits, n_trees, score_rows):
+    """
+    Atualiza o melhor resultado e o traço (tempo, melhor score até então);
+    score_rows é o número de linhas da validação cruzada que gerou o score
+    """
+    result['n_fits'] += n_fits
+    result['n_trees'] += n_trees
+    if best_score > result['best_score']:
+        result['best_score'] = float(best_score)
+        result['best_params'] = best_params
+        result['score_rows'] = score_rows
+    result['elapsed'] = time.perf_counter() - start
+    result['trace'].append((result['elapsed'], result['best_score']))
+
+
+def _n_trees(estimator, params):
+    """Árvores (estimadores) construídas em um ajuste; 0 para modelos sem árvores"""
+    defaults = estimator.get_params()
+    if 'n_estimators' not in defaults:
+        return 0
+    return params.get('n_estimators', defaults['n_estimators'])
+
+
+def _load_cached_scores(store, model_name, estimator, candidates, labels, data_hash):
+    """Scores gravados por (candidato, fold); NaN/None onde o job ainda não rodou"""
+    cached = [[None] * len(labels) for _ in candidates]
+    if store is not None:
+        for j, params in enumerate(candidates):
+            key_params = estimator_params(estimator, **params)
+            for i, label in enumerate(labels):
+                cached[j][i] = store.get(model_name, key_params, label, data_hash)
+    return cached
+
+
+def _budgeted(jobs, start, budget_seconds):
+    """
+    Repassa os jobs enquanto houver orçamento: o prazo é conferido antes de
+    despachar cada (candidato, fold), então só os jobs já em execução
+    terminam depois dele
+    """
+    for job in jobs:
+        if _out_of_budget(start, budget_seconds):
+            return
+        yield job
+
+
+def _run_jobs(func, jobs, n_jobs, start, budget_seconds):
+    """
+    Executa func(*args) para cada args de jobs e gera os resultados na ordem,
+    à medida que ficam prontos; para de despachar ao esgotar o orçamento
+    """
+    tasks = (delayed(func)(*args) for args in _budgeted(jobs, start, budget_seconds))
+    # pre_dispatch='n_jobs': nenhum job espera na fila do joblib além dos em execução
+    return Parallel(n_jobs=n_jobs, return_as='generator', pre_dispatch='n_jobs')(tasks)
+
+
+def _fit_and_score(estimator, params, X, y, train_idx, test_idx, scorer):
+    """Ajusta um candidato em um fold e avalia no fold de validação (NaN se falhar, como no GridSearchCV)"""
+    model = clone(estimator).set_params(**params)
+    try:
+        model.fit(_safe_indexing(X, train_idx), _safe_indexing(y, train_idx))
+    except Exception:
+        return np.nan
+    return scorer(model, _safe_indexing(X, test_idx), _safe_indexing(y, test_idx))
+
+
+def _cv_scores(estimator, candidates, X, y, cv, scoring, n_jobs, start, budget_seconds,
+               fold_scores=None, on_score=None):
+    """
+    Validação cruzada dos candidatos, um job por (candidato, fold), nas mesmas
+    divisões do GridSearchCV (StratifiedKFold sem embaralhar)
+
+    Args:
+        fold_scores: Matriz (candidatos, folds) com scores já conhecidos; só
+            as posições NaN são avaliadas
+        on_score: Chamado como on_score(j, i, score) a cada job concluído
+
+    Returns:
+        (fold_scores, n_computed): NaN onde o orçamento acabou antes do job;
+        n_computed é o número de folds ajustados por candidato
+    """
+    if fold_scores is None:
+        fold_scores = np.full((len(candidates), cv), np.nan)
+    folds = list(StratifiedKFold(n_splits=cv).split(X, y))
+    scorer = get_scorer(scoring)
+    pending = [(j, i) for j in range(len(candidates)) for i in range(cv)
+               if np.isnan(fold_scores[j, i])]
+    jobs = ((estimator, candidates[j], X, y, *folds[i], scorer) for j, i in pending)
+    n_computed = np.zeros(len(candidates), dtype=np.int64)
+    for (j, i), score in zip(pending, _run_jobs(_fit_and_score, jobs, n_jobs, start,
+                                                budget_seconds)):
+        fold_scores[j, i] = score
+        n_computed[j] += 1
+        if on_score is not None:
+            on_score(j, i, score)
+    return fold_scores, n_computed
+
+
+def _evaluate_candidates(engine, model_name, estimator, candidates, X, y, cv, scoring, n_jobs,
+                         budget_seconds, store=None):
+    """
+    Avalia uma lista de candidatos, um job por (candidato, fold), parando de
+    despachar ao esgotar o orçamento
+    """
+    result = _new_result(engine)
+    start = time.perf_counter()
+    data_hash = content_hash(X, y) if store is not None else None
+    labels = [f'{scoring}:cv{i}/{cv}' for i in range(cv)]
+    fold_scores = np.array(
+        _load_cached_scores(store, model_name, estimator, candidates, labels, data_hash),
+        dtype=np.float64
+    ).reshape(len(candidates), cv)
+    missing = np.isnan(fold_scores).sum(axis=1)
+    n_computed = np.zeros(len(candidates), dtype=np.int64)
+    for j in np.flatnonzero(missing == 0):
+        _record(result, start, fold_scores[j].mean(), candidates[j], 0, 0, len(y))
+
+    def on_score(j, i, score):
+        # Cada score vai para o store assim que sai; o candidato entra no
+        # resultado quando o último fold termina
+        if store is not None:
+            store.put(model_name, estimator_params(estimator, **candidates[j]), labels[i],
+                      float(score), data_hash)
+        missing[j] -= 1
+        n_computed[j] += 1
+        if missing[j] == 0:
+            n_fits = int(n_computed[j])
+            _record(result, start, fold_scores[j].mean(), candidates[j], n_fits,
+                    _n_trees(estimator, candidates[j]) * n_fits, len(y))
+
+    _cv_scores(estimator, candidates, X, y, cv, scoring, n_jobs, start, budget_seconds,
+               fold_scores, on_score)
+    # Folds de candidatos interrompidos pelo orçamento (ficam no store para retomar)
+    for j in np.flatnonzero((missing > 0) & (n_computed > 0)):
+        result['n_fits'] += int(n_computed[j])
+        result['n_trees'] += _n_trees(estimator, candidates[j]) * int(n_computed[j])
+    result['elapsed'] = time.perf_counter() - start
+    return result
+
+
+def grid_search(model_name, estimator, X, y, cv=5, scoring='f1_weighted', n_jobs=-1,
+                budget_seconds=None, random_state=42, store=None, **_):
+    """Busca exaustiva sobre GRID_SPACES"""
+    candidates = list(ParameterGrid(GRID_SPACES[model_name]))
+    return _evaluate_candidates('grid', model_name, estimator, candidates, X, y, cv, scoring,
+                                n_jobs, budget_seconds, store)
+
+
+def random_search(model_name, estimator, X, y, cv=5, scoring='f1_weighted', n_jobs=-1,
+                  budget_seconds=None, random_state=42, n_iter=20, store=None, **_):
+    """Amostragem aleatória de n_iter candidatos de SEARCH_SPACES"""
+    candidates = list(ParameterSampler(SEARCH_SPACES[model_name], n_iter,
+                                       random_state=random_state))
+    return _evaluate_candidates('random', model_name, estimator, candidates, X, y, cv, scoring,
+                                n_jobs, budget_seconds, store)
+
+
+def _halving_space(model_name):
+    """Espaço sem o parâmetro usado como recurso"""
+    resource = RESOURCES[model_name][0]
+    return {key: value for key, value in SEARCH_SPACES[model_name].items() if key != resource}
+
+
+def _resource_limits(model_name, y, cv):
+    """(recurso, mínimo, máximo) do successive halving, com os limites de n_samples resolvidos"""
+    resource, min_resources, max_resources = RESOURCES[model_name]
+    if resource == 'n_samples':
+        # Mesmos limites de 'smallest' e 'auto' do sklearn
+        min_resources = 2 * cv * len(np.unique(y))
+        max_resources = len(y)
+    return resource, min_resources, max_resources
+
+
+def _subsample(X, y, n_samples, random_state):
+    """Amostra estratificada de n_samples linhas (recurso n_samples)"""
+    # A divisão estratificada precisa deixar ao menos uma linha de cada classe de fora
+    if n_samples > len(y) - len(np.unique(y)):
+        return X, y
+    idx, _ = train_test_split(np.arange(len(y)), train_size=n_samples, stratify=y,
+                              random_state=random_state)
+    return _safe_indexing(X, idx), _safe_indexing(y, idx)
+
+
+def _run_bracket(model_name, estimator, X, y, n_candidates, min_resources, factor,
+                 cv, scoring, n_jobs, random_state, start, budget_seconds):
+    """
+    Um bracket de successive halving, degrau a degrau (mesmo cronograma do
+    HalvingRandomSearchCV): cada degrau avalia os candidatos restantes com
+    min_resources * factor**i e mantém o melhor 1/factor. O orçamento é
+    conferido antes de cada (candidato, fold); os candidatos de um degrau são
+    avaliados na ordem do degrau anterior, então um degrau interrompido ainda
+    compara os melhores entre os que terminaram.
+
+    Returns:
+        (best_score, best_params, n_fits, n_trees, score_rows): melhor do
+        último degrau com algum candidato concluído, avaliado sobre
+        score_rows linhas (com o recurso n_samples, uma subamostra);
+        best_params é None se nenhum candidato coube no orçamento
+    """
+    resource, _, max_resources = _resource_limits(model_name, y, cv)
+    candidates = list(ParameterSampler(_halving_space(model_name), n_candidates,
+                                       random_state=random_state))
+    n_possible = 1 + int(math.floor(math.log(max_resources // min_resources, factor)))
+    n_required = 1 + int(math.floor(math.log(n_candidates, factor)))
+
+    best_score, best_params, n_fits, n_trees, score_rows = -np.inf, None, 0, 0, None
+    for i in range(min(n_possible, n_required)):
+        if _out_of_budget(start, budget_seconds):
+            break
+        n_resources = int(min_resources * factor ** i)
+        if resource == 'n_estimators':
+            rung = [{**params, resource: n_resources} for params in candidates]
+            X_rung, y_rung = X, y
+        else:
+            rung = candidates
+            X_rung, y_rung = _subsample(X, y, n_resources, random_state + i)
+        fold_scores, n_computed = _cv_scores(estimator, rung, X_rung, y_rung, cv, scoring,
+                                             n_jobs, start, budget_seconds)
+        n_fits += int(n_computed.sum())
+        n_trees += sum(_n_trees(estimator, params) * int(n)
+                       for params, n in zip(rung, n_computed))
+        complete = n_computed == cv
+        if not complete.any():
+            break
+        scores = np.where(complete, np.nan_to_num(fold_scores.mean(axis=1), nan=-np.inf), -np.inf)
+        order = np.argsort(-scores, kind='stable')
+        best_score, best_params, score_rows = scores[order[0]], rung[order[0]], len(y_rung)
+        if not complete.all():
+            # Orçamento esgotado no meio do degrau
+            break
+        candidates = [candidates[j] for j in order[:math.ceil(len(candidates) / factor)]]
+    return best_score, best_params, n_fits, n_trees, score_rows
+
+
+def halving_search(model_name, estimator, X, y, cv=5, scoring='f1_weighted', n_jobs=-1,
+                   budget_seconds=None, random_state=42, n_candidates=27, factor=3, **_):
+    """Um bracket de successive halving começando no recurso mínimo"""
+    result = _new_result('halving')
+    start = time.perf_counter()
+    _, min_resources, _ = _resource_limits(model_name, y, cv)
+    best_score, best_params, n_fits, n_trees, score_rows = _run_bracket(
+        model_name, estimator, X, y, n_candidates, min_resources, factor, cv, scoring, n_jobs,
+        random_state, start, budget_seconds
+    )
+    if best_params is not None:
+        _record(result, start, best_score, best_params, n_fits, n_trees, score_rows)
+    else:
+        result['n_fits'], result['n_trees'] = n_fits, n_trees
+    result['elapsed'] = time.perf_counter() - start
+    return result
+
+
+def hyperband_search(model_name, estimator, X, y, cv=5, scoring='f1_weighted', n_jobs=-1,
+                     budget_seconds=None, random_state=42, factor=3, **_):
+    """
+    Hyperband: brackets do mais agressivo (muitos candidatos, pouco recurso)
+    ao mais conservador (poucos candidatos, recurso máximo)
+    """
+    result = _new_result('hyperband')
+    start = time.perf_counter()
+    _, min_resources, max_resources = _resource_limits(model_name, y, cv)
+
+    s_max = int(math.log(max_resources / min_resources, factor))
+    for s in range(s_max, -1, -1):
+        if _out_of_budget(start, budget_seconds):
+            break
+        n_candidates = int(math.ceil((s_max + 1) / (s + 1) * factor ** s))
+        bracket_min = max(min_resources, int(max_resources / factor ** s))
+        best_score, best_params, n_fits, n_trees, score_rows = _run_bracket(
+            model_name, estimator, X, y, n_candidates, bracket_min, factor, cv, scoring, n_jobs,
+            random_state + s, start, budget_seconds
+        )
+        if best_params is not None:
+            _record(result, start, best_score, best_params, n_fits, n_trees, score_rows)
+        else:
+            result['n_fits'] += n_fits
+            result['n_trees'] += n_trees
+    result['elapsed'] = time.perf_counter() - start
+    return result
+
+
+def _grow_and_score(estimator, params, stages, X, y, train_idx, test_idx, scorer):
+    """Cresce um único modelo até cada estágio, avaliando no fold de validação"""
+    model = clone(estimator).set_params(**params, warm_start=True)
+    X_fit, y_fit = _safe_indexing(X, train_idx), _safe_indexing(y, train_idx)
+    X_val, y_val = _safe_indexing(X, test_idx), _safe_indexing(y, test_idx)
+    scores = []
+    for n_estimators in stages:
+        # Com warm_start, fit só constrói as árvores que faltam até n_estimators
+        model.set_params(n_estimators=n_estimators)
+        model.fit(X_fit, y_fit)
+        scores.append(scorer(model, X_val, y_val))
+    return scores
+
+
+def warm_start_search(model_name, estimator, X, y, cv=5, scoring='f1_weighted', n_jobs=-1,
+                      budget_seconds=None, random_state=42, stages=None, store=None, **_):
+    """
+    Grade de GRID_SPACES sem n_estimators; cada (configuração, fold) cresce um
+    único modelo e é avaliado em todos os estágios de WARM_START_STAGES. O
+    orçamento é conferido antes de cada (configuração, fold)
+    """
+    if model_name not in WARM_START_MODELS:
+        raise ValueError(f"warm_start não suportado para {model_name} "
+                         f"(apenas {', '.join(WARM_START_MODELS)})")
+    stages = sorted(stages or WARM_START_STAGES)
+    space = {key: value for key, value in GRID_SPACES[model_name].items() if key != 'n_estimators'}
+    configs = list(ParameterGrid(space))
+    folds = list(StratifiedKFold(n_splits=cv).split(X, y))
+    scorer = get_scorer(scoring)
+
+    result = _new_result('warm_start')
+    start = time.perf_counter()
+    data_hash = content_hash(X, y) if store is not None else None
+    labels = [f'warm_start:{scoring}:cv{i}/{cv}:{stages}' for i in range(cv)]
+    # fold_scores[j][i] = scores por estágio da configuração j no fold i
+    fold_scores = _load_cached_scores(store, model_name, estimator, configs, labels, data_hash)
+    missing = [sum(scores is None for scores in row) for row in fold_scores]
+    n_computed = [0] * len(configs)
+
+    def record(j):
+        # (fold, estágio) -> média sobre os folds
+        mean_scores = np.asarray(fold_scores[j], dtype=np.float64).mean(axis=0)
+        best_stage = int(mean_scores.argmax())
+        _record(result, start, mean_scores[best_stage],
+                {**configs[j], 'n_estimators': stages[best_stage]},
+                n_computed[j], n_computed[j] * stages[-1], len(y))
+
+    for j in range(len(configs)):
+        if missing[j] == 0:
+            record(j)
+    pending = [(j, i) for j in range(len(configs)) for i in range(cv) if fold_scores[j][i] is None]
+    jobs = ((estimator, configs[j], stages, X, y, *folds[i], scorer) for j, i in pending)
+    for (j, i), scores in zip(pending, _run_jobs(_grow_and_score, jobs, n_jobs, start,
+                                                 budget_seconds)):
+        fold_scores[j][i] = scores
+        if store is not None:
+            store.put(model_name, estimator_params(estimator, **configs[j]), labels[i],
+                      scores, data_hash)
+        missing[j] -= 1
+        n_computed[j] += 1
+        if missing[j] == 0:
+            record(j)
+    # Folds de configurações interrompidas pelo orçamento (ficam no store para retomar)
+    for j in range(len(configs)):
+        if missing[j] > 0 and n_computed[j] > 0:
+            result['n_fits'] += n_computed[j]
+            result['n_trees'] += n_computed[j] * stages[-1]
+    result['elapsed'] = time.perf_counter() - start
+    return result
+
+
+SEARCH_ENGINES = {
+    'grid': grid_search,
+    'random': random_search,
+    'halving': halving_search,
+    'hyperband': hyperband_search,
+    'warm_start': warm_start_search
+}
+
+
+def run_search(engine, model_name, estimator, X, y, budget_seconds=None, **kwargs):
+    """
+    Executa a busca com o motor escolhido
+
+    Os motores não reajustam nada durante a busca; só o melhor candidato é
+    reajustado no conjunto completo, uma única vez, ao final.
+
+    Returns:
+        Dicionário com best_params, best_score, score_rows (linhas da
+        validação cruzada que gerou best_score: menos que len(y) com o
+        recurso n_samples), best_estimator, n_fits, n_trees (árvores
+        construídas, incluindo o reajuste final), elapsed e trace (lista de
+        (segundos, melhor score até então))
+    """
+    if engine not in SEARCH_ENGINES:
+        raise ValueError(f"Motor de busca inválido: {engine} (opções: {', '.join(SEARCH_ENGINES)})")
+    if model_name not in SEARCH_SPACES:
+        raise ValueError(f"Sem espaço de busca para o modelo: {model_name}")
+    result = SEARCH_ENGINES[engine](model_name, clone(estimator), X, y,
+                                    budget_seconds=budget_seconds, **kwargs)
+    if result['best_params'] is None:
+        print(f"⚠️ Orçamento de {budget_seconds}s esgotado antes de avaliar algum candidato "
+              f"({engine}); usando os parâmetros padrão de {model_name}")
+        result['best_params'] = {}
+    result['best_estimator'] = clone(estimator).set_params(**result['best_params']).fit(X, y)
+    result['n_fits'] += 1
+    result['n_trees'] += _n_trees(estimator, result['best_params'])
+    return result
+
+
+def engines_for(model_name):
+    """Motores aplicáveis ao modelo"""
+    return [engine for engine in SEARCH_ENGINES
+            if engine != 'warm_start' or model_name in WARM_START_MODELS]
+
+
+def time_to_score(result, target):
+    """Segundos até o motor atingir target (None se não atingiu)"""
+    for elapsed, score in result['trace']:
+        if score >= target:
+            return elapsed
+    return None
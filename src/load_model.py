@@ -4,11 +4,18 @@ Utilitário para carregar modelo e pré-processador
 import joblib
 import os
 
-def load_trained_model(model_path='models/obesity_model.joblib'):
-    """Carrega o modelo treinado"""
+def load_trained_model(model_path='models/obesity_model.joblib', mmap_mode=None):
+    """
+    Carrega o modelo treinado
+
+    Args:
+        model_path: Caminho do modelo
+        mmap_mode: Repassado ao joblib.load (ex.: 'r' para mapear os arrays
+            em memória somente leitura, compartilhados entre processos)
+    """
     if not os.path.exists(model_path):
         raise FileNotFoundError(f"Modelo não encontrado em {model_path}. Execute train_model.py primeiro.")
-    return joblib.load(model_path)
+    return joblib.load(model_path, mmap_mode=mmap_mode)
 
 def load_preprocessor(preprocessor_path='models/preprocessor.joblib'):
     """Carrega o pré-processador"""
@@ -0,0 +1,382 @@
+"""
+Tabela pré-computada de predições sobre o espaço discretizado de entrada
+Tech Challenge - Sistema Preditivo de Obesidade
+
+Depois do arredondamento do formulário, FCVC/NCP/CH2O/FAF/TUE têm poucos
+níveis inteiros e as categóricas poucos valores; só Idade, Altura e Peso são
+contínuos. O "modo lookup" pré-computa as probabilidades do modelo sobre a
+grade completa (categóricas x ordinais x níveis de Idade/Altura/IMC) e grava
+em um .npy que é mapeado em memória: uma predição vira um acesso por índice.
+
+Peso é representado pelo IMC (Peso = IMC * Altura²), que é a variável que de
+fato separa as classes; assim poucos níveis de altura bastam.
+
+A discretização custa acurácia: com os níveis padrão, a tabela concorda com o
+modelo em ~90% das linhas de data/obesity.csv (o arredondamento das ordinais
+sozinho mantém 99,7%; a perda vem dos níveis de Idade/Altura/IMC). A
+concordância é medida na construção e gravada nos metadados; a aplicação só
+usa a tabela com concordância de ao menos MIN_AGREEMENT.
+
+Uso (a partir da raiz do projeto):
+    python -m src.lookup_table build --out models/lookup_table.npy
+    python -m src.lookup_table agreement --table models/lookup_table.npy --data data/obesity.csv
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.load_model import load_trained_model, load_preprocessor
+from src.fast_predictor import FastPredictor
+from src.prediction_cache import model_file_signature
+from src.schema import read_dataset
+
+ORDINAL_LEVELS = {
+    'FCVC': [1, 2, 3],
+    'NCP': [1, 2, 3, 4],
+    'CH2O': [1, 2, 3],
+    'FAF': [0, 1, 2, 3],
+    'TUE': [0, 1, 2]
+}
+
+# Valores representativos de cada faixa; uma entrada cai no nível mais próximo
+DEFAULT_CONTINUOUS_LEVELS = {
+    'Age': [19, 23, 30],
+    'Height': [1.60, 1.75],
+    'BMI': [17, 21.5, 26, 28.5, 32, 37, 44]
+}
+
+PROBA_SCALE = 255
+
+# Concordância mínima com o modelo para a tabela ser servida pela aplicação
+MIN_AGREEMENT = 0.99
+
+
+class LookupTable:
+    """Tabela de probabilidades (uint8) indexada pela grade discretizada"""
+
+    def __init__(self, table, axes, classes, model_signature=None, agreement=None,
+                 fill_values=None):
+        """
+        Args:
+            table: Array (n_células, n_classes) uint8, normalmente um memmap
+            axes: Lista de (campo, tipo, valores) na ordem do índice misto
+            classes: Classes do modelo
+            model_signature: Assinatura do modelo usado na construção
+            agreement: Relatório de measure_agreement gravado nos metadados
+            fill_values: Valores de imputação do treino (ausentes na entrada),
+                os mesmos do FastPredictor
+        """
+        self.table = table
+        self.axes = axes
+        self.classes = np.asarray(classes)
+        self.model_signature = model_signature
+        self.agreement = agreement
+        self.fill_values = fill_values or {}
+        self.shape = tuple(len(values) for _, _, values in axes)
+        self.strides = np.cumprod((self.shape + (1,))[::-1])[::-1][1:]
+
+        self._category_maps = {}
+        self._edges = {}
+        for field, kind, values in axes:
+            if kind == 'categorical':
+                self._category_maps[field] = {v: i for i, v in enumerate(values)}
+            else:
+                # Fronteiras entre níveis = pontos médios (nível mais próximo)
+                values = np.asarray(values, dtype=np.float64)
+                self._edges[field] = (values[1:] + values[:-1]) / 2
+
+    @staticmethod
+    def grid_axes(preprocessor_data, continuous_levels=None):
+        """Eixos da grade: categóricas do pré-processador, ordinais e contínuas"""
+        continuous_levels = continuous_levels or DEFAULT_CONTINUOUS_LEVELS
+        axes = [
+            (col, 'categorical', [str(v) for v in le.classes_])
+            for col, le in preprocessor_data['label_encoders'].items()
+        ]
+        axes += [(col, 'ordinal', levels) for col, levels in ORDINAL_LEVELS.items()]
+        axes += [(col, 'continuous', list(levels)) for col, levels in continuous_levels.items()]
+        return axes
+
+    # ------------------------------------------------------------------
+    # Indexação
+    # ------------------------------------------------------------------
+    def _value(self, input_data, field):
+        """Valor de entrada, ou o valor de imputação do treino se ausente (None/NaN)"""
+        value = input_data.get(field)
+        if value is None or value != value:
+            value = self.fill_values.get(field)
+        if value is None:
+            raise ValueError(f"Valor ausente para {field}")
+        return value
+
+    def _filled(self, df, field):
+        """Coluna do lote com os ausentes preenchidos pelos valores de treino"""
+        values = df[field]
+        if field in self.fill_values and values.hasnans:
+            values = values.fillna(self.fill_values[field])
+        if values.hasnans:
+            raise ValueError(f"Valor ausente para {field}")
+        return values
+
+    @staticmethod
+    def _check_height(height):
+        if np.any(height <= 0):
+            raise ValueError(f"Altura inválida: {np.min(height)} (deve ser positiva)")
+
+    def _axis_position(self, field, kind, values, value):
+        if kind == 'categorical':
+            position = self._category_maps[field].get(str(value))
+            if position is None:
+                raise ValueError(f"Categoria inválida para {field}: {value!r}")
+            return position
+        if kind == 'ordinal':
+            position = int(round(value)) - values[0]
+            return min(max(position, 0), len(values) - 1)
+        return int(np.searchsorted(self._edges[field], value))
+
+    def index(self, input_data):
+        """
+        Índice da célula para um dicionário de entrada (mesmo formato de
+        make_prediction); ausentes recebem os valores de imputação do treino e
+        categorias desconhecidas ou altura não positiva geram ValueError
+        """
+        values = {field: self._value(input_data, field)
+                  for field, _, _ in self.axes if field != 'BMI'}
+        height = self._value(input_data, 'Height')
+        self._check_height(height)
+        values['BMI'] = self._value(input_data, 'Weight') / (height ** 2)
+        idx = 0
+        for (field, kind, levels), stride in zip(self.axes, self.strides):
+            idx += int(stride) * self._axis_position(field, kind, levels, values[field])
+        return idx
+
+    def index_frame(self, df):
+        """Versão vetorizada de index para um DataFrame com as colunas brutas"""
+        idx = np.zeros(len(df), dtype=np.int64)
+        height = self._filled(df, 'Height').to_numpy(dtype=np.float64)
+        self._check_height(height)
+        bmi = self._filled(df, 'Weight').to_numpy(dtype=np.float64) / height ** 2
+        for (field, kind, levels), stride in zip(self.axes, self.strides):
+            if kind == 'categorical':
+                column = self._filled(df, field).astype(str)
+                position = pd.Index(levels).get_indexer(column)
+                if (position < 0).any():
+                    raise ValueError(f"Categoria inválida para {field}: "
+                                     f"{column[position < 0].iloc[0]!r}")
+            elif kind == 'ordinal':
+                column = self._filled(df, field).to_numpy(dtype=np.float64)
+                position = np.clip(np.round(column) - levels[0],
+                                   0, len(levels) - 1).astype(np.int64)
+            else:
+                column = bmi if field == 'BMI' else self._filled(df, field).to_numpy(dtype=np.float64)
+                position = np.searchsorted(self._edges[field], column)
+            idx += stride * position
+        return idx
+
+    def predict(self, input_data):
+        """
+        Predição por consulta à tabela
+
+        Returns:
+            Tupla (prediction, probabilities, classes), no mesmo formato de make_prediction
+        """
+        probabilities = self.table[self.index(input_data)] / PROBA_SCALE
+        return self.classes[probabilities.argmax()], probabilities, self.classes
+
+    def predict_proba_frame(self, df):
+        return self.table[self.index_frame(df)] / PROBA_SCALE
+
+    def is_stale(self, model_path):
+        """True se o modelo em disco mudou desde a construção da tabela"""
+        signature = model_file_signature(model_path)
+        return signature is None or list(signature) != list(self.model_signature or [])
+
+    def is_accurate(self, min_agreement=MIN_AGREEMENT):
+        """True se a concordância medida com o modelo é de ao menos min_agreement"""
+        return self.agreement is not None and self.agreement['agreement'] >= min_agreement
+
+    # ------------------------------------------------------------------
+    # Construção e persistência
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _metadata_path(path):
+        return os.path.splitext(path)[0] + '.json'
+
+    @classmethod
+    def record_agreement(cls, path, report):
+        """Grava o relatório de concordância nos metadados da tabela"""
+        metadata_path = cls._metadata_path(path)
+        with open(metadata_path, encoding='utf-8') as f:
+            metadata = json.load(f)
+        metadata['agreement'] = report
+        with open(metadata_path, 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, indent=2)
+
+    @classmethod
+    def build(cls, model, preprocessor_data, path='models/lookup_table.npy',
+              continuous_levels=None, chunk_rows=1_000_000,
+              model_path='models/obesity_model.joblib', data_path='data/obesity.csv'):
+        """
+        Avalia o modelo em todas as células da grade e grava a tabela em disco
+
+        A tabela é escrita direto em um memmap, bloco a bloco, então a memória
+        usada na construção é limitada por chunk_rows. Ao final, a concordância
+        com o modelo nas linhas de data_path é medida e gravada nos metadados.
+        """
+        axes = cls.grid_axes(preprocessor_data, continuous_levels)
+        shape = tuple(len(values) for _, _, values in axes)
+        n_cells = int(np.prod(shape))
+        predictor = FastPredictor(model, preprocessor_data)
+        n_classes = len(predictor.classes)
+
+        print(f"🔧 Construindo tabela: {n_cells:,} células x {n_classes} classes "
+              f"({n_cells * n_classes / 1024 ** 2:,.1f} MB)")
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        table = np.lib.format.open_memmap(path, mode='w+', dtype=np.uint8,
+                                          shape=(n_cells, n_classes))
+        start_time = time.perf_counter()
+        for start in range(0, n_cells, chunk_rows):
+            stop = min(start + chunk_rows, n_cells)
+            positions = np.unravel_index(np.arange(start, stop), shape)
+            chunk = {
+                field: np.asarray(values)[position]
+                for (field, _, values), position in zip(axes, positions)
+            }
+            chunk['Weight'] = chunk.pop('BMI') * chunk['Height'] ** 2
+            probabilities = predictor.predict_proba_frame(pd.DataFrame(chunk))
+            table[start:stop] = np.rint(probabilities * PROBA_SCALE).astype(np.uint8)
+            elapsed = time.perf_counter() - start_time
+            print(f"   {stop:,}/{n_cells:,} células ({stop / elapsed:,.0f} células/s)")
+        table.flush()
+
+        signature = model_file_signature(model_path)
+        # Escalares NumPy (moda/mediana) viram tipos nativos para o JSON
+        fill_values = {
+            col: value.item() if hasattr(value, 'item') else value
+            for col, value in preprocessor_data.get('fill_values', {}).items()
+        }
+        with open(cls._metadata_path(path), 'w', encoding='utf-8') as f:
+            json.dump({
+                'axes': axes,
+                'classes': [str(c) for c in predictor.classes],
+                'model_signature': list(signature) if signature else None,
+                'fill_values': fill_values
+            }, f, indent=2)
+        print(f"✅ Tabela salva em {path}")
+        table = cls(np.load(path, mmap_mode='r'), axes, predictor.classes, signature,
+                    fill_values=fill_values)
+
+        table.agreement = measure_agreement(table, model, preprocessor_data,
+                                            read_dataset(data_path))
+        cls.record_agreement(path, table.agreement)
+        print(f"   Concordância com o modelo em {data_path}: {table.agreement['agreement']:.2%}")
+        if not table.is_accurate():
+            print(f"⚠️ Abaixo do mínimo de {MIN_AGREEMENT:.0%}: a aplicação não usará a tabela "
+                  f"(ajuste os níveis ou LOOKUP_MIN_AGREEMENT)")
+        return table
+
+    @classmethod
+    def load(cls, path='models/lookup_table.npy'):
+        """Mapeia a tabela em memória (somente leitura)"""
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Tabela não encontrada em {path}. Execute 'python -m src.lookup_table build'.")
+        with open(cls._metadata_path(path), encoding='utf-8') as f:
+            metadata = json.load(f)
+        axes = [tuple(axis) for axis in metadata['axes']]
+        return cls(np.load(path, mmap_mode='r'), axes, metadata['classes'],
+                   metadata['model_signature'], metadata.get('agreement'),
+                   metadata.get('fill_values'))
+
+
+def measure_agreement(table, model, preprocessor_data, df):
+    """
+    Compara a tabela com o modelo ao vivo sobre as linhas de df
+
+    Returns:
+        Dicionário com concordância de classe, diferença média de probabilidade
+        e, se df tiver a coluna Obesity, a acurácia de cada caminho
+    """
+    predictor = FastPredictor(model, preprocessor_data)
+    live = predictor.predict_proba_frame(df)
+    lookup = table.predict_proba_frame(df)
+    live_labels = predictor.classes[live.argmax(axis=1)]
+    lookup_labels = table.classes[lookup.argmax(axis=1)]
+
+    report = {
+        'rows': len(df),
+        'agreement': float((live_labels == lookup_labels).mean()),
+        'mean_abs_proba_diff': float(np.abs(live - lookup).mean())
+    }
+    if 'Obesity' in df.columns:
+        report['accuracy_live'] = float((live_labels == df['Obesity'].to_numpy()).mean())
+        report['accuracy_lookup'] = float((lookup_labels == df['Obesity'].to_numpy()).mean())
+    return report
+
+
+def _parse_levels(args):
+    levels = dict(DEFAULT_CONTINUOUS_LEVELS)
+    for field, values in (('Age', args.age_levels), ('Height', args.height_levels),
+                          ('BMI', args.bmi_levels)):
+        if values:
+            levels[field] = sorted(values)
+    return levels
+
+
+def main(argv=None):
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Tabela pré-computada de predições")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='Constrói a tabela a partir do modelo')
+    build_parser.add_argument('--out', default='models/lookup_table.npy')
+    build_parser.add_argument('--age-levels', type=float, nargs='+')
+    build_parser.add_argument('--height-levels', type=float, nargs='+')
+    build_parser.add_argument('--bmi-levels', type=float, nargs='+')
+    build_parser.add_argument('--chunk-rows', type=int, default=1_000_000)
+
+    agreement_parser = subparsers.add_parser('agreement', help='Mede a concordância com o modelo')
+    agreement_parser.add_argument('--table', default='models/lookup_table.npy')
+
+    for sub in (build_parser, agreement_parser):
+        sub.add_argument('--data', default='data/obesity.csv',
+                         help='Linhas usadas para medir a concordância')
+        sub.add_argument('--model', default='models/obesity_model.joblib')
+        sub.add_argument('--preprocessor', default='models/preprocessor.joblib')
+    args = parser.parse_args(argv)
+
+    model = load_trained_model(args.model)
+    preprocessor_data = load_preprocessor(args.preprocessor)
+
+    if args.command == 'build':
+        LookupTable.build(model, preprocessor_data, path=args.out,
+                          continuous_levels=_parse_levels(args),
+                          chunk_rows=args.chunk_rows, model_path=args.model,
+                          data_path=args.data)
+        return
+
+    table = LookupTable.load(args.table)
+    if table.is_stale(args.model):
+        print("⚠️ O modelo mudou desde a construção da tabela; reconstrua com 'build'.")
+    df = read_dataset(args.data)
+    report = measure_agreement(table, model, preprocessor_data, df)
+    LookupTable.record_agreement(args.table, report)
+
+    print("=" * 60)
+    print("CONCORDÂNCIA: TABELA x MODELO")
+    print("=" * 60)
+    print(f"Linhas avaliadas: {report['rows']:,}")
+    print(f"Concordância de classe: {report['agreement']:.2%}")
+    print(f"Diferença média de probabilidade: {report['mean_abs_proba_diff']:.4f}")
+    if 'accuracy_live' in report:
+        print(f"Acurácia do modelo: {report['accuracy_live']:.2%}")
+        print(f"Acurácia da tabela: {report['accuracy_lookup']:.2%}")
+    if report['agreement'] < MIN_AGREEMENT:
+        print(f"⚠️ Abaixo do mínimo de {MIN_AGREEMENT:.0%}: a aplicação não usará a tabela")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Cache de resultados de predição
+Tech Challenge - Sistema Preditivo de Obesidade
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# As 16 variáveis de entrada usadas pelo modelo (campos como nome do paciente
+# ou do profissional não entram na chave)
+MODEL_FIELDS = (
+    'Gender', 'Age', 'Height', 'Weight', 'family_history', 'FAVC', 'FCVC', 'NCP',
+    'CAEC', 'SMOKE', 'CH2O', 'SCC', 'FAF', 'TUE', 'CALC', 'MTRANS'
+)
+
+
+def model_file_signature(model_path):
+    """Assinatura do arquivo do modelo (mtime, tamanho); muda quando o modelo é re-salvo"""
+    try:
+        stat = os.stat(model_path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def canonical_key(input_data):
+    """
+    Hash canônico das variáveis de entrada do modelo
+
+    Números são normalizados para float (30 e 30.0 geram a mesma chave) e a
+    ordem dos campos é fixa, independente da ordem do dicionário.
+    """
+    values = []
+    for field in MODEL_FIELDS:
+        value = input_data.get(field)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = float(value)
+        values.append(value)
+    payload = json.dumps(values, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class PredictionCache:
+    """
+    Cache LRU com TTL para os resultados de make_prediction
+
+    Invalida todas as entradas automaticamente quando o arquivo do modelo muda.
+    """
+
+    def __init__(self, maxsize=1024, ttl_seconds=3600, model_path='models/obesity_model.joblib'):
+        """
+        Args:
+            maxsize: Número máximo de entradas
+            ttl_seconds: Tempo de vida de cada entrada
+            model_path: Arquivo do modelo monitorado para invalidação
+        """
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.model_path = model_path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._signature = model_file_signature(model_path)
+
+    def _check_model(self):
+        signature = model_file_signature(self.model_path)
+        if signature != self._signature:
+            self._entries.clear()
+            self._signature = signature
+
+    def get(self, input_data):
+        """Retorna o resultado em cache ou None"""
+        key = canonical_key(input_data)
+        with self._lock:
+            self._check_model()
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, input_data, result):
+        """Armazena um resultado, descartando a entrada menos usada se necessário"""
+        key = canonical_key(input_data)
+        with self._lock:
+            self._check_model()
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, input_data, compute):
+        """Retorna o resultado em cache ou calcula com compute() e armazena"""
+        result = self.get(input_data)
+        if result is None:
+            result = compute()
+            self.put(input_data, result)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Contadores de acerto/erro do cache"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._entries),
+            'hit_rate': self.hits / total if total else 0.0
+        }
@@ -0,0 +1,114 @@
+"""
+Armazenamento em disco dos resultados de treinamento (checkpoints)
+Tech Challenge - Sistema Preditivo de Obesidade
+
+Cada job (modelo, parâmetros, fold) é gravado em um arquivo joblib próprio,
+em um diretório por impressão digital dos dados (data_fingerprint: hash do
+CSV + código de pré-processamento). Uma nova execução pula os jobs já
+gravados; quando os dados ou o pré-processamento mudam, o diretório antigo é
+descartado automaticamente.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import joblib
+import numpy as np
+
+# Parâmetros que não alteram o resultado do ajuste
+IGNORED_PARAMS = ('n_jobs', 'verbose')
+
+
+def estimator_params(estimator, **overrides):
+    """Parâmetros do estimador relevantes para a chave do job"""
+    params = {key: value for key, value in estimator.get_params(deep=False).items()
+              if key not in IGNORED_PARAMS}
+    params.update(overrides)
+    return params
+
+
+def content_hash(*arrays):
+    """
+    Hash do conteúdo dos dados de um conjunto de jobs
+
+    Os arrays são normalizados antes do hash (numéricos em float64 contíguo,
+    rótulos e demais tipos em str) para que o mesmo conteúdo dê a mesma chave
+    venha ele do pré-processamento ou do cache (X mapeado em memória, y object).
+    """
+    normalized = []
+    for array in arrays:
+        columns = list(array.columns) if hasattr(array, 'columns') else None
+        values = np.asarray(array)
+        if values.dtype.kind in 'biuf':
+            values = np.ascontiguousarray(values, dtype=np.float64)
+        else:
+            values = values.astype(str)
+        normalized.append((columns, values))
+    return joblib.hash(normalized)
+
+
+class ResultsStore:
+    """Diretório de resultados de jobs, um arquivo joblib por job"""
+
+    def __init__(self, root='models/training_results', fingerprint=''):
+        """
+        Args:
+            root: Diretório raiz do armazenamento
+            fingerprint: Impressão digital dos dados (data_fingerprint)
+        """
+        self.root = root
+        self.fingerprint = fingerprint
+        self.directory = os.path.join(root, fingerprint[:16] or 'default')
+        os.makedirs(self.directory, exist_ok=True)
+        self.invalidated = self._prune()
+
+    def _prune(self):
+        """Remove resultados de impressões digitais antigas"""
+        removed = 0
+        current = os.path.basename(self.directory)
+        for entry in os.listdir(self.root):
+            path = os.path.join(self.root, entry)
+            if entry != current and os.path.isdir(path):
+                removed += len(os.listdir(path))
+                shutil.rmtree(path, ignore_errors=True)
+        return removed
+
+    @staticmethod
+    def job_key(model_name, params, fold, data_hash=None):
+        """Chave estável de um job (modelo, parâmetros, fold, dados)"""
+        payload = json.dumps(
+            {'model': model_name, 'params': params, 'fold': fold, 'data': data_hash},
+            sort_keys=True, default=repr
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.joblib')
+
+    def get(self, model_name, params, fold, data_hash=None):
+        """Resultado gravado do job, ou None se ainda não foi executado"""
+        path = self._path(self.job_key(model_name, params, fold, data_hash))
+        if not os.path.exists(path):
+            return None
+        try:
+            return joblib.load(path)
+        except Exception:
+            # Arquivo incompleto (execução interrompida durante a escrita)
+            return None
+
+    def put(self, model_name, params, fold, result, data_hash=None):
+        """Grava o resultado do job de forma atômica (arquivo temporário + rename)"""
+        path = self._path(self.job_key(model_name, params, fold, data_hash))
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(fd)
+        try:
+            joblib.dump(result, tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def __len__(self):
+        return sum(1 for entry in os.listdir(self.directory) if entry.endswith('.joblib'))
@@ -0,0 +1,202 @@
+"""
+Esquema tipado do dataset (data/obesity.csv)
+Tech Challenge - Sistema Preditivo de Obesidade
+
+Fonte única dos tipos das colunas, usada por todos os leitores do CSV
+(pré-processamento e treino, aplicação Streamlit, notebook de EDA e
+utilitários de avaliação):
+    - texto como category, com as categorias fixas do dicionário de dados
+      (CATEGORIES): um código de 1 byte por linha em vez de um objeto str,
+      groupby/crosstab agrupando por código e as mesmas categorias em
+      qualquer arquivo ou subconjunto;
+    - numéricas como float32.
+
+A leitura é servida por uma cópia colunar do CSV (Feather sem compressão,
+em <pasta do CSV>/cache/), convertida uma única vez e mapeada em memória:
+só as colunas pedidas (columns=) são lidas do disco. A cópia é refeita
+quando o CSV muda (data de modificação/tamanho e, se diferentes, hash do
+conteúdo) ou quando este esquema muda.
+
+O dicionário de dados descreve FCVC, NCP, CH2O, FAF e TUE como respostas
+inteiras (0 a 4), mas o arquivo traz valores fracionários (amostras
+sintéticas), assim como Age; por isso nenhuma coluna é int8: o tipo
+truncaria os dados.
+"""
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+TARGET_COL = 'Obesity'
+
+# Colunas de texto e suas categorias (dicionário de dados)
+CATEGORIES = {
+    'Gender': ['Female', 'Male'],
+    'family_history': ['no', 'yes'],
+    'FAVC': ['no', 'yes'],
+    'CAEC': ['Always', 'Frequently', 'Sometimes', 'no'],
+    'SMOKE': ['no', 'yes'],
+    'SCC': ['no', 'yes'],
+    'CALC': ['Always', 'Frequently', 'Sometimes', 'no'],
+    'MTRANS': ['Automobile', 'Bike', 'Motorbike', 'Public_Transportation', 'Walking'],
+    TARGET_COL: ['Insufficient_Weight', 'Normal_Weight', 'Obesity_Type_I', 'Obesity_Type_II',
+                 'Obesity_Type_III', 'Overweight_Level_I', 'Overweight_Level_II']
+}
+
+NUMERIC_COLUMNS = ('Age', 'Height', 'Weight', 'FCVC', 'NCP', 'CH2O', 'FAF', 'TUE')
+
+# Categorias fixas (ordem alfabética, a mesma do LabelEncoder); valores fora
+# do dicionário viram NaN e são avisados na leitura (_apply_categories)
+DTYPES = {
+    **{col: pd.CategoricalDtype(categories) for col, categories in CATEGORIES.items()},
+    **{col: 'float32' for col in NUMERIC_COLUMNS}
+}
+# Tipos de leitura do texto: categorias inferidas, para detectar valores fora do dicionário
+_READ_DTYPES = {**DTYPES, **{col: 'category' for col in CATEGORIES}}
+
+
+CACHE_DIRNAME = 'cache'
+
+
+def _apply_categories(df):
+    """Fixa as categorias do dicionário, avisando sobre valores fora dele (viram NaN)"""
+    for col in df.columns.intersection(list(CATEGORIES)):
+        unknown = sorted(set(df[col].cat.categories) - set(CATEGORIES[col]))
+        if unknown:
+            print(f"⚠️ {col}: valores fora do dicionário de dados tratados como faltantes: {unknown}")
+        df[col] = df[col].astype(DTYPES[col])
+    return df
+
+
+def _read_csv(filepath, columns=None):
+    """Lê o CSV com os tipos do esquema"""
+    return _apply_categories(pd.read_csv(filepath, usecols=columns, dtype=_READ_DTYPES))
+
+
+def _file_hash(filepath):
+    """sha256 do conteúdo do arquivo, lido em blocos"""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _signature(filepath):
+    """Assinatura barata do CSV: data de modificação (ns) e tamanho"""
+    stat = os.stat(filepath)
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def columnar_paths(filepath='data/obesity.csv'):
+    """Caminhos da cópia colunar (.feather) e de seus metadados (.json)"""
+    directory = os.path.join(os.path.dirname(filepath), CACHE_DIRNAME)
+    stem = os.path.splitext(os.path.basename(filepath))[0]
+    return os.path.join(directory, f'{stem}.feather'), os.path.join(directory, f'{stem}.json')
+
+
+def _write_atomic(path, write):
+    """Grava em um arquivo temporário e o renomeia (leitores concorrentes nunca veem meio arquivo)"""
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _write_meta(meta, meta_path):
+    """Grava os metadados da cópia colunar"""
+    def write(path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+    _write_atomic(meta_path, write)
+
+
+def convert_dataset(filepath='data/obesity.csv'):
+    """
+    Converte o CSV para a cópia colunar, com os tipos do esquema
+
+    Os metadados (assinatura e hash do CSV, hash do esquema) são gravados por
+    último: uma conversão interrompida não é tomada como válida.
+
+    Returns:
+        Caminho do arquivo .feather
+    """
+    import pyarrow.feather as feather
+
+    feather_path, meta_path = columnar_paths(filepath)
+    os.makedirs(os.path.dirname(feather_path), exist_ok=True)
+    meta = {**_signature(filepath), 'sha256': _file_hash(filepath), 'schema': _file_hash(__file__)}
+    df = _read_csv(filepath)
+    # Sem compressão: o arquivo pode ser mapeado em memória e lido por coluna
+    _write_atomic(feather_path, lambda path: feather.write_feather(df, path, compression='uncompressed'))
+    _write_meta(meta, meta_path)
+    return feather_path
+
+
+def ensure_columnar(filepath='data/obesity.csv'):
+    """
+    Garante que a cópia colunar está em dia com o CSV e o esquema
+
+    Se a data de modificação ou o tamanho mudaram, compara o hash do
+    conteúdo: um CSV apenas tocado (mesmo conteúdo) não é reconvertido.
+
+    Returns:
+        Caminho do arquivo .feather
+    """
+    feather_path, meta_path = columnar_paths(filepath)
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return convert_dataset(filepath)
+    if meta.get('schema') != _file_hash(__file__) or not os.path.exists(feather_path):
+        return convert_dataset(filepath)
+
+    signature = _signature(filepath)
+    if all(meta.get(key) == value for key, value in signature.items()):
+        return feather_path
+    if meta.get('size') != signature['size'] or meta.get('sha256') != _file_hash(filepath):
+        return convert_dataset(filepath)
+    # Mesmo conteúdo: só atualiza a assinatura
+    meta.update(signature)
+    _write_meta(meta, meta_path)
+    return feather_path
+
+
+def _writable(df):
+    """Copia os códigos das categóricas (1 byte por linha), que o Arrow entrega somente leitura"""
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = pd.Categorical.from_codes(df[col].array.codes.copy(), dtype=df[col].dtype)
+    return df
+
+
+def read_dataset(filepath='data/obesity.csv', columns=None, cache=True, read_only=False,
+                 **kwargs):
+    """
+    Lê o dataset com os tipos do esquema
+
+    Args:
+        filepath: Caminho do CSV
+        columns: Colunas a carregar (None: todas)
+        cache: Serve a leitura pela cópia colunar (convertida se preciso)
+        read_only: Devolve o DataFrame sobre a cópia colunar mapeada em
+            memória, sem cópia; os valores não podem ser alterados (só para
+            leitura e agregações). Com False (padrão), o DataFrame é gravável
+        **kwargs: Repassados ao pd.read_csv (ex.: chunksize); desativam a cópia
+            colunar e o aviso de valores fora do dicionário
+    """
+    if cache and not kwargs:
+        try:
+            feather_path = ensure_columnar(filepath)
+        except OSError:
+            # Pasta do CSV somente leitura: lê o texto diretamente
+            pass
+        else:
+            import pyarrow.feather as feather
+            table = feather.read_table(feather_path, columns=columns, memory_map=read_only)
+            df = table.to_pandas()
+            return df if read_only else _writable(df)
+    if kwargs:
+        return pd.read_csv(filepath, usecols=columns, dtype=DTYPES, **kwargs)
+    return _read_csv(filepath, columns)
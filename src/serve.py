@@ -0,0 +1,264 @@
+"""
+Serviço HTTP de predição com micro-batching
+Tech Challenge - Sistema Preditivo de Obesidade
+
+Uso (a partir da raiz do projeto):
+    python -m src.serve --port 8000 --batch-window-ms 2 --max-batch-rows 64
+    python -m src.serve --async --queue-size 256      # modo asyncio (src/serve_async.py)
+
+Endpoints:
+    POST /predict        corpo: um paciente (mesmo dicionário de make_prediction)
+    POST /predict_batch  corpo: lista de pacientes
+    GET  /health
+    GET  /metrics        (apenas no modo --async)
+
+Requisições concorrentes são agrupadas em micro-lotes (até --max-batch-rows
+linhas ou --batch-window-ms milissegundos, o que ocorrer primeiro) e cada
+micro-lote faz uma única chamada vetorizada a predict_proba.
+"""
+import argparse
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from src.load_model import load_trained_model, load_preprocessor
+from src.fast_predictor import FastPredictor
+
+# Maior corpo aceito (acima disso: 413)
+MAX_BODY_BYTES = 8 * 1024 * 1024
+
+
+class MicroBatcher:
+    """Agrupa linhas já pré-processadas e avalia o modelo uma vez por lote"""
+
+    def __init__(self, predictor, max_batch_rows=64, batch_window_ms=2.0):
+        """
+        Args:
+            predictor: FastPredictor usado para avaliar o modelo
+            max_batch_rows: Máximo de linhas por chamada ao modelo
+            batch_window_ms: Tempo máximo de espera para completar um lote
+        """
+        self.predictor = predictor
+        self.max_batch_rows = max_batch_rows
+        self.batch_window = batch_window_ms / 1000.0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, X):
+        """Enfileira uma matriz de features e retorna um Future com as probabilidades"""
+        future = Future()
+        self._queue.put((X, future))
+        return future
+
+    def _collect(self):
+        """Bloqueia até o primeiro item e completa o lote dentro da janela"""
+        batch = [self._queue.get()]
+        rows = len(batch[0][0])
+        deadline = time.perf_counter() + self.batch_window
+        while rows < self.max_batch_rows:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                probabilities = self.predictor.predict_proba_array(
+                    np.concatenate([X for X, _ in batch])
+                )
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            start = 0
+            for X, future in batch:
+                future.set_result(probabilities[start:start + len(X)])
+                start += len(X)
+
+
+def format_prediction(classes, probabilities):
+    """Resposta JSON de uma linha: classe prevista e probabilidades por classe"""
+    return {
+        'prediction': str(classes[probabilities.argmax()]),
+        'probabilities': {str(cls): float(p) for cls, p in zip(classes, probabilities)}
+    }
+
+
+def records_from_payload(path, payload):
+    """Normaliza o corpo de /predict (objeto) ou /predict_batch (lista) em lista de registros"""
+    records = [payload] if path == '/predict' else payload
+    if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+        raise ValueError('esperado um objeto JSON (/predict) ou lista de objetos (/predict_batch)')
+    return records
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    """Handler HTTP; o preditor e o micro-batcher ficam no servidor"""
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _content_length(self):
+        """
+        Tamanho do corpo, ou None depois de responder 400 (Content-Length
+        inválido) ou 413 (acima de max_body_bytes); o corpo não é lido e a
+        conexão é encerrada
+        """
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            if length < 0:
+                raise ValueError(length)
+        except ValueError:
+            self.close_connection = True
+            self._send_json(400, {'error': 'Content-Length inválido'})
+            return None
+        if length > self.server.max_body_bytes:
+            self.close_connection = True
+            self._send_json(413, {'error': f'Corpo maior que {self.server.max_body_bytes} bytes'})
+            return None
+        return length
+
+    def _read_json(self, length):
+        return json.loads(self.rfile.read(length) or b'null')
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        else:
+            self._send_json(404, {'error': f'Rota não encontrada: {self.path}'})
+
+    def do_POST(self):
+        if self.path not in ('/predict', '/predict_batch'):
+            self._send_json(404, {'error': f'Rota não encontrada: {self.path}'})
+            return
+
+        length = self._content_length()
+        if length is None:
+            return
+
+        predictor = self.server.predictor
+        try:
+            records = records_from_payload(self.path, self._read_json(length))
+            X = predictor.transform_records(records)
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {'error': f'Entrada inválida: {e}'})
+            return
+        except Exception as e:
+            self._send_json(500, {'error': f'Erro ao processar a entrada: {e}'})
+            return
+        if not records:
+            # Lote vazio: nada a avaliar
+            self._send_json(200, {'predictions': []})
+            return
+
+        try:
+            probabilities = self.server.batcher.submit(X).result()
+        except Exception as e:
+            self._send_json(500, {'error': f'Erro ao fazer predição: {e}'})
+            return
+
+        results = [format_prediction(predictor.classes, p) for p in probabilities]
+        if self.path == '/predict':
+            self._send_json(200, results[0])
+        else:
+            self._send_json(200, {'predictions': results})
+
+    def log_message(self, format, *args):
+        # Silencia o log por requisição do BaseHTTPRequestHandler
+        pass
+
+
+class PredictionServer(ThreadingHTTPServer):
+    """Servidor HTTP multi-thread que compartilha o preditor e o micro-batcher"""
+
+    # Fila de conexões do socket maior que o padrão (5) para picos de clientes
+    request_queue_size = 128
+
+    def __init__(self, server_address, predictor, batcher, max_body_bytes=MAX_BODY_BYTES):
+        super().__init__(server_address, PredictionHandler)
+        self.predictor = predictor
+        self.batcher = batcher
+        self.max_body_bytes = max_body_bytes
+
+
+def create_server(host='127.0.0.1', port=8000, max_batch_rows=64, batch_window_ms=2.0,
+                  model_path='models/obesity_model.joblib',
+                  preprocessor_path='models/preprocessor.joblib'):
+    """Carrega o modelo uma única vez e cria o servidor HTTP"""
+    model = load_trained_model(model_path)
+    preprocessor_data = load_preprocessor(preprocessor_path)
+    # Lotes pequenos: n_jobs=1 evita o custo de threads por chamada ao modelo
+    predictor = FastPredictor(model, preprocessor_data, n_jobs=1)
+
+    batcher = MicroBatcher(predictor, max_batch_rows=max_batch_rows,
+                           batch_window_ms=batch_window_ms)
+    return PredictionServer((host, port), predictor, batcher)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serviço HTTP de predição de obesidade")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--batch-window-ms', type=float, default=2.0,
+                        help='Tempo máximo de espera para formar um micro-lote (padrão: 2 ms)')
+    parser.add_argument('--max-batch-rows', type=int, default=64,
+                        help='Máximo de linhas por micro-lote (padrão: 64)')
+    parser.add_argument('--model', default='models/obesity_model.joblib')
+    parser.add_argument('--preprocessor', default='models/preprocessor.joblib')
+
+    async_group = parser.add_argument_group('modo asyncio')
+    async_group.add_argument('--async', dest='use_async', action='store_true',
+                             help='Usa o servidor asyncio com fila limitada e backpressure')
+    async_group.add_argument('--queue-size', type=int, default=256,
+                             help='Requisições aguardando o modelo antes de responder 503 (padrão: 256)')
+    async_group.add_argument('--executor', choices=['thread', 'process'], default='thread',
+                             help='Executor das chamadas ao modelo (padrão: thread)')
+    async_group.add_argument('--executor-workers', type=int, default=2,
+                             help='Threads/processos do executor (padrão: 2)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Função principal"""
+    args = parse_args(argv)
+    if args.use_async:
+        from src.serve_async import run
+        run(args)
+        return
+
+    server = create_server(args.host, args.port, args.max_batch_rows, args.batch_window_ms,
+                           args.model, args.preprocessor)
+    print(f"🚀 Serviço de predição em http://{args.host}:{args.port}")
+    print(f"   Micro-lotes: até {args.max_batch_rows} linhas ou {args.batch_window_ms} ms")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n✅ Serviço encerrado pelo usuário.")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""
+Modo asyncio do serviço de predição, com fila limitada e backpressure
+Tech Challenge - Sistema Preditivo de Obesidade
+
+Uso (a partir da raiz do projeto):
+    python -m src.serve --async --queue-size 256 --executor thread --executor-workers 2
+
+O loop de eventos aceita conexões sem bloquear e apenas enfileira as linhas
+pré-processadas; o pré-processamento e as chamadas ao modelo (CPU) rodam em
+um executor de threads ou de processos. Cada requisição reserva uma vaga da
+fila antes do pré-processamento; sem vaga, ela é recusada na hora com 503 e
+Retry-After, em vez de acumular latência para todos os clientes.
+GET /metrics expõe a profundidade da fila e as latências p50/p99.
+"""
+import asyncio
+import json
+import math
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
+
+import numpy as np
+
+from src.load_model import load_trained_model, load_preprocessor
+from src.fast_predictor import FastPredictor
+from src.serve import MAX_BODY_BYTES, format_prediction, records_from_payload
+
+MAX_HEADER_BYTES = 64 * 1024
+
+# Preditor de cada processo do executor (modo --executor process)
+_worker_predictor = None
+
+
+def _init_worker(model_path, preprocessor_path):
+    """Carrega o modelo uma única vez em cada processo do executor"""
+    global _worker_predictor
+    model = load_trained_model(model_path, mmap_mode='r')
+    _worker_predictor = FastPredictor(model, load_preprocessor(preprocessor_path), n_jobs=1)
+
+
+def _predict_in_worker(X):
+    return _worker_predictor.predict_proba_array(X)
+
+
+def _transform_in_worker(records):
+    return _worker_predictor.transform_records(records)
+
+
+def _worker_ready():
+    return _worker_predictor is not None
+
+
+class LatencyMetrics:
+    """Contadores e janela deslizante de latências (em ms) para /metrics"""
+
+    def __init__(self, window=10_000):
+        self.latencies = deque(maxlen=window)
+        self.requests_total = 0
+        self.rejected_total = 0
+        self.batches_total = 0
+
+    def observe(self, latency_ms):
+        self.requests_total += 1
+        self.latencies.append(latency_ms)
+
+    def percentile(self, q):
+        if not self.latencies:
+            return None
+        return float(np.percentile(self.latencies, q))
+
+    def mean_service_ms(self):
+        """Latência média recente, usada para estimar o Retry-After"""
+        if not self.latencies:
+            return 0.0
+        return float(np.mean(self.latencies))
+
+
+class AsyncPredictionServer:
+    """Servidor HTTP/1.1 mínimo sobre asyncio com fila de predição limitada"""
+
+    def __init__(self, predictor, queue_size=256, max_batch_rows=64,
+                 executor='thread', executor_workers=2, max_body_bytes=MAX_BODY_BYTES,
+                 model_path='models/obesity_model.joblib',
+                 preprocessor_path='models/preprocessor.joblib'):
+        """
+        Args:
+            predictor: FastPredictor usado para pré-processar as requisições
+            queue_size: Máximo de requisições aguardando o modelo
+            max_batch_rows: Máximo de linhas por chamada ao modelo
+            executor: 'thread' ou 'process'
+            executor_workers: Número de threads/processos para o modelo
+            max_body_bytes: Maior corpo de requisição aceito (acima disso: 413)
+        """
+        self.predictor = predictor
+        self.queue_size = queue_size
+        self.max_batch_rows = max_batch_rows
+        self.executor_workers = executor_workers
+        self.max_body_bytes = max_body_bytes
+        self.metrics = LatencyMetrics()
+        self._in_flight = 0
+        # Requisições admitidas ainda sem lugar no modelo: em pré-processamento
+        # ou na fila. A vaga é reservada antes do pré-processamento, então
+        # nunca há mais de queue_size delas (nem no executor)
+        self._pending = 0
+
+        if executor == 'process':
+            self._executor = ProcessPoolExecutor(
+                max_workers=executor_workers, initializer=_init_worker,
+                initargs=(model_path, preprocessor_path)
+            )
+            self._predict_fn = _predict_in_worker
+            self._transform_fn = _transform_in_worker
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=executor_workers)
+            self._predict_fn = predictor.predict_proba_array
+            self._transform_fn = predictor.transform_records
+
+    # ------------------------------------------------------------------
+    # Fila e consumidores
+    # ------------------------------------------------------------------
+    async def _consume(self):
+        """Retira requisições da fila, agrupa em lote e avalia no executor"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            rows = len(batch[0][0])
+            while rows < self.max_batch_rows and not self._queue.empty():
+                item = self._queue.get_nowait()
+                batch.append(item)
+                rows += len(item[0])
+            self._pending -= len(batch)
+
+            self._in_flight += len(batch)
+            try:
+                probabilities = await loop.run_in_executor(
+                    self._executor, self._predict_fn, np.concatenate([X for X, _ in batch])
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                start = 0
+                for X, future in batch:
+                    if not future.done():
+                        future.set_result(probabilities[start:start + len(X)])
+                    start += len(X)
+            finally:
+                self._in_flight -= len(batch)
+                self.metrics.batches_total += 1
+
+    def retry_after_seconds(self):
+        """Estimativa de quando a fila terá espaço, a partir da latência recente"""
+        backlog = self._pending + self._in_flight
+        estimate_ms = backlog * self.metrics.mean_service_ms() / max(self.executor_workers, 1)
+        return max(1, math.ceil(estimate_ms / 1000))
+
+    def metrics_payload(self):
+        return {
+            'queue_depth': self._queue.qsize(),
+            'queue_capacity': self.queue_size,
+            'pending': self._pending,
+            'in_flight': self._in_flight,
+            'requests_total': self.metrics.requests_total,
+            'rejected_total': self.metrics.rejected_total,
+            'batches_total': self.metrics.batches_total,
+            'latency_ms': {
+                'p50': self.metrics.percentile(50),
+                'p99': self.metrics.percentile(99)
+            }
+        }
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+    def _overloaded(self):
+        self.metrics.rejected_total += 1
+        retry_after = self.retry_after_seconds()
+        return (HTTPStatus.SERVICE_UNAVAILABLE,
+                {'error': 'Serviço sobrecarregado, tente novamente',
+                 'retry_after_seconds': retry_after},
+                {'Retry-After': str(retry_after)})
+
+    async def _handle_predict(self, path, body):
+        start = time.perf_counter()
+        try:
+            records = records_from_payload(path, json.loads(body or b'null'))
+        except (ValueError, TypeError) as e:
+            return HTTPStatus.BAD_REQUEST, {'error': f'Entrada inválida: {e}'}, {}
+        if not records:
+            # Lote vazio: nada a avaliar
+            return HTTPStatus.OK, {'predictions': []}, {}
+        if self._pending >= self.queue_size:
+            # Recusa antes de gastar o executor com o pré-processamento
+            return self._overloaded()
+
+        # Reserva a vaga na fila antes do pré-processamento; ela é liberada
+        # pelo consumidor ao retirar a requisição, ou aqui em caso de erro
+        self._pending += 1
+        enqueued = False
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        try:
+            # Loop por registro em Python: fora do loop de eventos, como o modelo
+            X = await loop.run_in_executor(self._executor, self._transform_fn, records)
+            self._queue.put_nowait((X, future))
+            enqueued = True
+        except (ValueError, KeyError, TypeError) as e:
+            return HTTPStatus.BAD_REQUEST, {'error': f'Entrada inválida: {e}'}, {}
+        except Exception as e:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {'error': f'Erro ao processar a entrada: {e}'}, {}
+        finally:
+            if not enqueued:
+                self._pending -= 1
+
+        try:
+            probabilities = await future
+        except Exception as e:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {'error': f'Erro ao fazer predição: {e}'}, {}
+        self.metrics.observe((time.perf_counter() - start) * 1000)
+
+        results = [format_prediction(self.predictor.classes, p) for p in probabilities]
+        if path == '/predict':
+            return HTTPStatus.OK, results[0], {}
+        return HTTPStatus.OK, {'predictions': results}, {}
+
+    async def _route(self, method, path, body):
+        if method == 'GET' and path == '/health':
+            return HTTPStatus.OK, {'status': 'ok'}, {}
+        if method == 'GET' and path == '/metrics':
+            return HTTPStatus.OK, self.metrics_payload(), {}
+        if method == 'POST' and path in ('/predict', '/predict_batch'):
+            return await self._handle_predict(path, body)
+        return HTTPStatus.NOT_FOUND, {'error': f'Rota não encontrada: {path}'}, {}
+
+    @staticmethod
+    def _encode_response(status, payload, headers, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        lines = [
+            f'HTTP/1.1 {status.value} {status.phrase}',
+            'Content-Type: application/json; charset=utf-8',
+            f'Content-Length: {len(body)}',
+            f"Connection: {'keep-alive' if keep_alive else 'close'}"
+        ]
+        lines += [f'{name}: {value}' for name, value in headers.items()]
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+
+    async def _reject(self, writer, status, message):
+        """Responde um erro de protocolo e marca a conexão para encerramento"""
+        writer.write(self._encode_response(status, {'error': message}, {}, keep_alive=False))
+        await writer.drain()
+
+    async def _handle_connection(self, reader, writer):
+        """Atende requisições de uma conexão (com keep-alive)"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+
+                request_line, *header_lines = head.decode('latin-1').split('\r\n')
+                headers = {}
+                for line in header_lines:
+                    if ':' in line:
+                        name, value = line.split(':', 1)
+                        headers[name.strip().lower()] = value.strip()
+                try:
+                    method, path, version = request_line.split(' ', 2)
+                    length = int(headers.get('content-length', 0))
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    await self._reject(writer, HTTPStatus.BAD_REQUEST,
+                                       'Linha de requisição ou Content-Length inválidos')
+                    break
+                if length > self.max_body_bytes:
+                    # O corpo não é lido: a conexão é encerrada
+                    await self._reject(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                       f'Corpo maior que {self.max_body_bytes} bytes')
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                try:
+                    status, payload, extra_headers = await self._route(method, path, body)
+                except Exception as e:
+                    status, payload, extra_headers = (HTTPStatus.INTERNAL_SERVER_ERROR,
+                                                      {'error': f'Erro interno: {e}'}, {})
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' and (
+                    version == 'HTTP/1.1' or connection == 'keep-alive'
+                )
+                writer.write(self._encode_response(status, payload, extra_headers, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8000):
+        """Inicia os consumidores e atende conexões até ser cancelado"""
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        if isinstance(self._executor, ProcessPoolExecutor):
+            # Cria os processos antes de aceitar conexões: criados sob demanda,
+            # herdariam o socket do cliente e a conexão não fecharia com ele
+            await asyncio.get_running_loop().run_in_executor(self._executor, _worker_ready)
+        consumers = [asyncio.create_task(self._consume()) for _ in range(self.executor_workers)]
+        server = await asyncio.start_server(self._handle_connection, host, port,
+                                            limit=MAX_HEADER_BYTES, backlog=1024)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in consumers:
+                task.cancel()
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def run(args):
+    """Executa o modo asyncio a partir dos argumentos de src.serve"""
+    model = load_trained_model(args.model)
+    predictor = FastPredictor(model, load_preprocessor(args.preprocessor), n_jobs=1)
+    server = AsyncPredictionServer(
+        predictor, queue_size=args.queue_size, max_batch_rows=args.max_batch_rows,
+        executor=args.executor, executor_workers=args.executor_workers,
+        model_path=args.model, preprocessor_path=args.preprocessor
+    )
+    print(f"🚀 Serviço de predição (asyncio) em http://{args.host}:{args.port}")
+    print(f"   Fila: até {args.queue_size} requisições | executor: "
+          f"{args.executor} x {args.executor_workers}")
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\n✅ Serviço encerrado pelo usuário.")
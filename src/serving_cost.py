@@ -0,0 +1,148 @@
+"""
+Custo de servir cada modelo candidato e seleção com restrição de latência
+Tech Challenge - Sistema Preditivo de Obesidade
+
+Mede, no mesmo caminho usado em produção (FastPredictor: array já
+pré-processado e predict_proba), a latência de uma linha (p50/p99), a
+latência de um lote de 1024 linhas, o tamanho serializado e o tempo de
+carga de cada candidato. A seleção escolhe o melhor F1 dentro de um
+orçamento de p99 e o relatório marca a fronteira de Pareto (F1 x p99).
+"""
+import io
+import time
+
+import joblib
+import numpy as np
+
+from fast_predictor import FastPredictor
+
+BATCH_SIZE = 1024
+
+
+def _percentiles_ms(timings):
+    timings = np.asarray(timings) * 1000
+    return np.percentile(timings, 50), np.percentile(timings, 99)
+
+
+def measure_serving_cost(model, X, n_single=200, n_batches=5, n_loads=3):
+    """
+    Mede latência, tamanho e tempo de carga de um modelo treinado
+
+    Args:
+        model: Modelo treinado
+        X: Linhas já pré-processadas no formato do modelo (ex.: X_test)
+        n_single: Número de predições de uma linha cronometradas
+        n_batches: Número de lotes de BATCH_SIZE linhas cronometrados
+        n_loads: Número de cargas (joblib.load) cronometradas
+
+    Returns:
+        Dicionário com single_p50_ms, single_p99_ms, batch_ms (mediana por
+        lote de BATCH_SIZE), size_kb e load_ms
+    """
+    X = np.asarray(X, dtype=np.float64)
+    single = FastPredictor._compile_model(model, n_jobs=1)
+    batch = FastPredictor._compile_model(model)
+
+    rows = X[np.arange(n_single) % len(X)]
+    single.predict_proba(rows[:1])  # aquecimento
+    timings = []
+    for i in range(n_single):
+        start = time.perf_counter()
+        single.predict_proba(rows[i:i + 1])
+        timings.append(time.perf_counter() - start)
+    single_p50, single_p99 = _percentiles_ms(timings)
+
+    X_batch = X[np.arange(BATCH_SIZE) % len(X)]
+    timings = []
+    for _ in range(n_batches):
+        start = time.perf_counter()
+        batch.predict_proba(X_batch)
+        timings.append(time.perf_counter() - start)
+    batch_ms = np.median(timings) * 1000
+
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    timings = []
+    for _ in range(n_loads):
+        buffer.seek(0)
+        start = time.perf_counter()
+        joblib.load(buffer)
+        timings.append(time.perf_counter() - start)
+
+    return {
+        'single_p50_ms': single_p50,
+        'single_p99_ms': single_p99,
+        'batch_ms': batch_ms,
+        'size_kb': buffer.getbuffer().nbytes / 1024,
+        'load_ms': np.median(timings) * 1000
+    }
+
+
+def pareto_front(results, score='f1_score', cost='single_p99_ms'):
+    """Candidatos não dominados (nenhum outro tem score maior ou igual com custo menor ou igual)"""
+    front = []
+    for name, result in results.items():
+        dominated = any(
+            other[score] >= result[score] and other[cost] <= result[cost]
+            and (other[score] > result[score] or other[cost] < result[cost])
+            for other_name, other in results.items() if other_name != name
+        )
+        if not dominated:
+            front.append(name)
+    return sorted(front, key=lambda name: results[name][cost])
+
+
+def select_model(results, max_p99_ms=None, score='f1_score'):
+    """
+    Escolhe o candidato de maior score dentro do orçamento de latência
+
+    Args:
+        results: Resultados por modelo (com as chaves de measure_serving_cost)
+        max_p99_ms: Orçamento de p99 de uma linha em ms (None: sem restrição)
+
+    Returns:
+        (nome do modelo, política aplicada)
+    """
+    if max_p99_ms is None:
+        return max(results, key=lambda x: results[x][score]), f'melhor {score}'
+
+    policy = f'melhor {score} com p99 <= {max_p99_ms:g} ms'
+    eligible = [name for name in results if results[name]['single_p99_ms'] <= max_p99_ms]
+    if not eligible:
+        fastest = min(results, key=lambda x: results[x]['single_p99_ms'])
+        print(f"⚠️ Nenhum modelo com p99 <= {max_p99_ms:g} ms; usando o mais rápido ({fastest})")
+        return fastest, policy + ' (nenhum elegível: mais rápido)'
+    return max(eligible, key=lambda x: results[x][score]), policy
+
+
+def print_serving_report(results, front):
+    """Tabela de custo de servir por modelo, com a fronteira de Pareto marcada"""
+    print("\n" + "=" * 84)
+    print("CUSTO DE SERVIR (* = fronteira de Pareto F1 x p99)")
+    print("=" * 84)
+    print(f"{'Modelo':<22} {'F1':>7} {'p50':>9} {'p99':>9} "
+          f"{'lote ' + str(BATCH_SIZE):>11} {'tamanho':>11} {'carga':>9}")
+    for name, result in sorted(results.items(), key=lambda item: item[1]['single_p99_ms']):
+        marker = '*' if name in front else ' '
+        print(f"{marker}{name:<21} {result['f1_score']:7.4f} "
+              f"{result['single_p50_ms']:6.2f} ms {result['single_p99_ms']:6.2f} ms "
+              f"{result['batch_ms']:8.1f} ms {result['size_kb']:8.0f} KB "
+              f"{result['load_ms']:6.1f} ms")
+
+
+def selection_metadata(results, best_name, policy, front):
+    """Metadados da escolha (modelo, política, custos e alternativas) em tipos JSON"""
+    keys = ('accuracy', 'f1_score', 'single_p50_ms', 'single_p99_ms', 'batch_ms',
+            'size_kb', 'load_ms')
+    candidates = {
+        name: {key: float(result[key]) for key in keys if key in result}
+        for name, result in results.items()
+    }
+    return {
+        'model': best_name,
+        'policy': policy,
+        'batch_size': BATCH_SIZE,
+        'pareto_front': front,
+        'selected': candidates[best_name],
+        'candidates': candidates
+    }
@@ -0,0 +1,291 @@
+"""
+Treinamento out-of-core para bases muito maiores que a memória
+Tech Challenge - Sistema Preditivo de Obesidade
+
+Duas passadas em blocos sobre o arquivo (CSV ou Parquet), com memória
+limitada pelo tamanho do bloco e das amostras:
+
+1. Estatísticas: contagem de categorias (descoberta incremental), classes
+   do alvo e StandardScaler.partial_fit nas colunas numéricas. Média e
+   variância dos códigos das categóricas saem das contagens, então o scaler
+   final é idêntico ao ajustado sobre a base inteira.
+2. Treino: cada bloco é pré-processado com os encoders/scaler finais e
+   alimenta um classificador incremental (SGD ou Naive Bayes via
+   partial_fit) ou uma amostra de tamanho fixo para um HistGradientBoosting.
+   Uma fração das linhas fica de fora (amostra de avaliação limitada).
+
+O partial_fit vê os blocos na ordem do arquivo e só embaralha as linhas
+dentro de cada bloco: a ordem das linhas no arquivo deve ser aleatória. Um
+arquivo ordenado pelo alvo (ou por data, região etc.) enviesa o modelo 'sgd'
+para as classes dos últimos blocos; embaralhe-o antes ou use o 'hgb'.
+
+Os artefatos gerados têm o mesmo formato de models/obesity_model.joblib e
+models/preprocessor.joblib.
+
+Uso (a partir da raiz do projeto):
+    python -m src.streaming_training registro.csv --model sgd --chunksize 200000
+    python -m src.streaming_training registro.parquet --model hgb --sample-rows 500000
+"""
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.naive_bayes import GaussianNB
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from src.batch_score import iter_chunks
+from src.data_preprocessing import DataPreprocessor
+from src.schema import NUMERIC_COLUMNS
+
+TARGET_COL = 'Obesity'
+STREAMING_MODELS = ('sgd', 'nb', 'hgb')
+
+
+class ReservoirSample:
+    """
+    Amostra uniforme de tamanho fixo sobre um fluxo de blocos
+
+    Cada linha recebe uma chave aleatória e ficam as capacity menores chaves
+    vistas até agora; a memória é O(capacity + bloco).
+    """
+
+    def __init__(self, capacity, seed=42):
+        self.capacity = capacity
+        self.rng = np.random.default_rng(seed)
+        self.keys = np.empty(0)
+        self.X = None
+        self.y = None
+
+    def add(self, X, y):
+        keys = np.concatenate([self.keys, self.rng.random(len(X))])
+        X = X if self.X is None else np.concatenate([self.X, X])
+        y = y if self.y is None else np.concatenate([self.y, y])
+        if len(keys) > self.capacity:
+            keep = np.argpartition(keys, self.capacity)[:self.capacity]
+            keys, X, y = keys[keep], X[keep], y[keep]
+        self.keys, self.X, self.y = keys, X, y
+
+    def __len__(self):
+        return len(self.keys)
+
+
+def fit_streaming_preprocessor(path, chunksize=100_000, target_col=TARGET_COL):
+    """
+    Primeira passada: ajusta encoders e scaler sem carregar o arquivo inteiro
+
+    Returns:
+        (preprocessor_data, fill_values, classes): preprocessor_data no formato
+        de preprocessor.joblib, valores de preenchimento de faltantes (moda
+        das categóricas e média das numéricas) e as classes do alvo
+    """
+    preprocessor = DataPreprocessor()
+    category_counts = {}
+    numeric_scaler = StandardScaler()
+    classes = set()
+    columns = None
+    numeric_cols = None
+    n_rows = 0
+
+    for chunk in iter_chunks(path, chunksize):
+        chunk = preprocessor.create_bmi(chunk)
+        if columns is None:
+            columns = [col for col in chunk.columns if col != target_col]
+            # Tipos do esquema, e não os inferidos do bloco: uma coluna de texto
+            # toda vazia no primeiro bloco seria lida como float. O IMC é
+            # derivado de Weight/Height
+            numeric_cols = [col for col in columns if col in NUMERIC_COLUMNS or col == 'BMI']
+        for col in columns:
+            if col in numeric_cols:
+                continue
+            counts = chunk[col].dropna().astype(str).value_counts()
+            category_counts[col] = category_counts.get(col, pd.Series(dtype=np.int64)).add(
+                counts, fill_value=0
+            )
+        numeric_scaler.partial_fit(chunk[numeric_cols])
+        classes.update(chunk[target_col].dropna().unique())
+        n_rows += len(chunk)
+
+    if columns is None:
+        raise ValueError(f"Arquivo vazio: {path}")
+
+    label_encoders = {}
+    fill_values = {}
+    mean = np.empty(len(columns))
+    var = np.empty(len(columns))
+    for i, col in enumerate(columns):
+        if col in numeric_cols:
+            j = numeric_cols.index(col)
+            mean[i], var[i] = numeric_scaler.mean_[j], numeric_scaler.var_[j]
+            fill_values[col] = numeric_scaler.mean_[j]
+            continue
+        counts = category_counts[col].sort_index()
+        le = LabelEncoder()
+        le.classes_ = counts.index.to_numpy(dtype=object)
+        label_encoders[col] = le
+        fill_values[col] = counts.idxmax()
+        # Código da categoria = posição em classes_; momentos a partir das contagens
+        codes = np.arange(len(counts))
+        weights = counts.to_numpy(dtype=np.float64)
+        mean[i] = np.average(codes, weights=weights)
+        var[i] = np.average((codes - mean[i]) ** 2, weights=weights)
+
+    scaler = StandardScaler()
+    scaler.mean_ = mean
+    scaler.var_ = var
+    scaler.scale_ = np.where(var > 0, np.sqrt(var), 1.0)
+    scaler.n_samples_seen_ = n_rows
+    scaler.n_features_in_ = len(columns)
+    scaler.feature_names_in_ = np.asarray(columns, dtype=object)
+
+    preprocessor_data = {
+        'label_encoders': label_encoders,
+        'scaler': scaler,
+        'feature_names': columns,
+        'fill_values': fill_values
+    }
+    return preprocessor_data, fill_values, np.array(sorted(classes))
+
+
+def iter_preprocessed_chunks(path, preprocessor_data, fill_values, chunksize=100_000,
+                             target_col=TARGET_COL):
+    """Segunda passada: gera (X float32, y) por bloco com os encoders/scaler finais"""
+    preprocessor = DataPreprocessor()
+    preprocessor.label_encoders = preprocessor_data['label_encoders']
+    preprocessor.scaler = preprocessor_data['scaler']
+    for chunk in iter_chunks(path, chunksize):
+        chunk = preprocessor.create_bmi(chunk).fillna(fill_values)
+        chunk = chunk.dropna(subset=[target_col])
+        chunk = preprocessor.encode_categorical(chunk, fit=False)
+        X, y = preprocessor.prepare_features(chunk, target_col=target_col)
+        X = preprocessor.scale_features(X[preprocessor_data['feature_names']], fit=False)
+        yield X.to_numpy(dtype=np.float32), y.to_numpy()
+
+
+def make_streaming_model(name, random_state=42):
+    """Classificador para o treino out-of-core"""
+    if name == 'sgd':
+        return SGDClassifier(loss='log_loss', alpha=1e-5, random_state=random_state)
+    if name == 'nb':
+        return GaussianNB()
+    if name == 'hgb':
+        return HistGradientBoostingClassifier(max_iter=200, early_stopping=True,
+                                              random_state=random_state)
+    raise ValueError(f"Modelo inválido: {name} (opções: {', '.join(STREAMING_MODELS)})")
+
+
+def train_streaming(path, model_name='sgd', chunksize=100_000, sample_rows=500_000,
+                    eval_rows=200_000, eval_fraction=0.05, random_state=42):
+    """
+    Treina um modelo sobre o arquivo inteiro com memória limitada
+
+    Args:
+        path: Arquivo CSV ou Parquet com as colunas do dataset
+        model_name: 'sgd' ou 'nb' (partial_fit bloco a bloco, com as linhas
+            embaralhadas dentro do bloco; a ordem do arquivo deve ser
+            aleatória) ou 'hgb' (ajustado sobre uma amostra uniforme de
+            sample_rows linhas)
+        chunksize: Linhas por bloco lido
+        sample_rows: Tamanho da amostra de treino do 'hgb'
+        eval_rows: Tamanho máximo da amostra de avaliação
+        eval_fraction: Fração das linhas separada para avaliação
+
+    Returns:
+        (model, preprocessor_data, report)
+    """
+    rng = np.random.default_rng(random_state)
+    timings = {}
+
+    start = time.perf_counter()
+    preprocessor_data, fill_values, classes = fit_streaming_preprocessor(path, chunksize)
+    timings['stats_seconds'] = time.perf_counter() - start
+
+    model = make_streaming_model(model_name, random_state)
+    train_sample = ReservoirSample(sample_rows, seed=random_state) if model_name == 'hgb' else None
+    eval_sample = ReservoirSample(eval_rows, seed=random_state + 1)
+    n_rows = 0
+    rows_read = 0
+
+    start = time.perf_counter()
+    for X, y in iter_preprocessed_chunks(path, preprocessor_data, fill_values, chunksize):
+        rows_read += len(X)
+        held_out = rng.random(len(X)) < eval_fraction
+        eval_sample.add(X[held_out], y[held_out])
+        X, y = X[~held_out], y[~held_out]
+        if train_sample is not None:
+            train_sample.add(X, y)
+        else:
+            order = rng.permutation(len(X))
+            model.partial_fit(X[order], y[order], classes=classes)
+        n_rows += len(X)
+    if train_sample is not None:
+        model.fit(train_sample.X, train_sample.y)
+    timings['train_seconds'] = time.perf_counter() - start
+
+    y_pred = model.predict(eval_sample.X)
+    report = {
+        'model': model_name,
+        'rows_read': rows_read,
+        'train_rows': n_rows,
+        'fit_rows': len(train_sample) if train_sample is not None else n_rows,
+        'eval_rows': len(eval_sample),
+        'accuracy': accuracy_score(eval_sample.y, y_pred),
+        'f1_score': f1_score(eval_sample.y, y_pred, average='weighted'),
+        **timings
+    }
+    return model, preprocessor_data, report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Treinamento out-of-core em blocos")
+    parser.add_argument('input', help='Arquivo .csv ou .parquet')
+    parser.add_argument('--model', choices=STREAMING_MODELS, default='sgd')
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    parser.add_argument('--sample-rows', type=int, default=500_000,
+                        help='Tamanho da amostra de treino do modelo hgb')
+    parser.add_argument('--eval-rows', type=int, default=200_000)
+    parser.add_argument('--model-out', default='models/streaming_model.joblib')
+    parser.add_argument('--preprocessor-out', default='models/streaming_preprocessor.joblib')
+    return parser.parse_args(argv)
+
+
+def print_report(report):
+    print("=" * 60)
+    print(f"TREINO OUT-OF-CORE ({report['model']})")
+    print("=" * 60)
+    print(f"Linhas de treino: {report['train_rows']:,} (ajuste sobre {report['fit_rows']:,})")
+    print(f"Linhas de avaliação: {report['eval_rows']:,}")
+    print(f"Acurácia: {report['accuracy']:.4f}")
+    print(f"F1-Score: {report['f1_score']:.4f}")
+    print(f"Passada de estatísticas: {report['stats_seconds']:.1f}s")
+    print(f"Passada de treino: {report['train_seconds']:.1f}s")
+
+
+def main(argv=None):
+    """Função principal"""
+    args = parse_args(argv)
+    try:
+        model, preprocessor_data, report = train_streaming(
+            args.input, args.model, chunksize=args.chunksize,
+            sample_rows=args.sample_rows, eval_rows=args.eval_rows
+        )
+    except (FileNotFoundError, ValueError) as e:
+        print(f"❌ Erro: {e}")
+        sys.exit(1)
+
+    print_report(report)
+    os.makedirs(os.path.dirname(args.model_out) or '.', exist_ok=True)
+    joblib.dump(model, args.model_out)
+    joblib.dump(preprocessor_data, args.preprocessor_out)
+    print(f"✅ Modelo salvo em {args.model_out}")
+    print(f"✅ Pré-processador salvo em {args.preprocessor_out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Escalonador de treinamento paralelo para o zoológico de modelos
+Tech Challenge - Sistema Preditivo de Obesidade
+
+Cada modelo gera 1 job de ajuste completo (avaliado no conjunto de teste) e
+cv jobs de validação cruzada, um por fold. Todos os jobs (modelo, fold) rodam
+em um pool de processos que lê X/y de uma única cópia em disco mapeada em
+memória (joblib.load com mmap_mode='r'). Com um ResultsStore, cada job
+concluído é gravado em disco e reaproveitado em execuções seguintes.
+"""
+import os
+import shutil
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
+from sklearn.model_selection import StratifiedKFold
+from threadpoolctl import threadpool_limits
+
+from results_store import content_hash, estimator_params
+
+
+def allocate_cores(n_jobs_total, n_workers=None):
+    """
+    Divide os núcleos da máquina entre os processos do pool
+
+    Returns:
+        (pool_size, cores_per_job): nenhum job usa mais que cores_per_job
+        threads, então pool_size * cores_per_job <= núcleos disponíveis
+    """
+    total_cores = n_workers or os.cpu_count() or 1
+    pool_size = max(1, min(total_cores, n_jobs_total))
+    return pool_size, max(1, total_cores // pool_size)
+
+
+def _limit_estimator_cores(estimator, cores):
+    """
+    Fixa n_jobs do estimador (ex.: RandomForest com n_jobs=-1) na cota do job
+
+    Returns:
+        O n_jobs original, para ser restaurado no modelo devolvido
+    """
+    params = estimator.get_params()
+    if 'n_jobs' not in params:
+        return None
+    estimator.set_params(n_jobs=cores)
+    return params['n_jobs']
+
+
+def _run_job(data_path, name, estimator, fold, train_idx, test_idx, cores):
+    """Executa um job (modelo, fold) em um processo do pool"""
+    data = joblib.load(data_path, mmap_mode='r')
+    columns = data['columns']
+    original_n_jobs = _limit_estimator_cores(estimator, cores)
+
+    if fold is None:
+        X_fit, y_fit = data['X_train'], data['y_train']
+        X_eval, y_eval = data['X_test'], data['y_test']
+    else:
+        X_fit, y_fit = data['X_train'][train_idx], data['y_train'][train_idx]
+        X_eval, y_eval = data['X_train'][test_idx], data['y_train'][test_idx]
+
+    start = time.perf_counter()
+    with threadpool_limits(limits=cores):
+        estimator.fit(pd.DataFrame(X_fit, columns=columns), y_fit)
+        fit_time = time.perf_counter() - start
+        y_pred = estimator.predict(pd.DataFrame(X_eval, columns=columns))
+    elapsed = time.perf_counter() - start
+
+    result = {'name': name, 'fold': fold, 'time': elapsed,
+              'accuracy': accuracy_score(y_eval, y_pred)}
+    if fold is None:
+        if original_n_jobs is not None:
+            estimator.set_params(n_jobs=original_n_jobs)
+        result.update({
+            'model': estimator,
+            'fit_time': fit_time,
+            'predict_time': elapsed - fit_time,
+            'f1_score': f1_score(y_eval, y_pred, average='weighted'),
+            'precision': precision_score(y_eval, y_pred, average='weighted'),
+            'recall': recall_score(y_eval, y_pred, average='weighted')
+        })
+    return result
+
+
+def _fold_label(fold, cv):
+    return 'holdout' if fold is None else f'cv{fold}/{cv}'
+
+
+def run_parallel_training(models, X_train, y_train, X_test, y_test, cv=5, n_workers=None,
+                          store=None):
+    """
+    Treina todos os modelos e folds de validação cruzada em paralelo
+
+    Args:
+        models: Dicionário nome -> estimador (não treinado)
+        X_train, y_train, X_test, y_test: Dados já divididos
+        cv: Número de folds (StratifiedKFold, como o cross_val_score)
+        n_workers: Núcleos disponíveis (padrão: todos)
+        store: ResultsStore opcional; jobs já gravados não são executados e
+            cada job concluído é gravado assim que termina
+
+    Returns:
+        (results, wall_time): results no mesmo formato de ModelTrainer.train_models,
+        com 'train_time' = soma do tempo dos jobs do modelo
+    """
+    columns = list(X_train.columns) if hasattr(X_train, 'columns') else None
+    folds = list(StratifiedKFold(n_splits=cv).split(X_train, y_train))
+    data_hash = content_hash(X_train, y_train, X_test, y_test) if store is not None else None
+
+    job_results = []
+    pending = []
+    for name, estimator in models.items():
+        params = estimator_params(estimator)
+        for fold, (train_idx, test_idx) in [(None, (None, None))] + list(enumerate(folds)):
+            cached = None
+            if store is not None:
+                cached = store.get(name, params, _fold_label(fold, cv), data_hash)
+            if cached is not None:
+                job_results.append(cached)
+            else:
+                pending.append((name, params, estimator, fold, train_idx, test_idx))
+
+    n_jobs_total = len(models) * (cv + 1)
+    if store is not None:
+        print(f"💾 {len(job_results)}/{n_jobs_total} jobs recuperados de {store.directory}")
+
+    start = time.perf_counter()
+    if pending:
+        pool_size, cores_per_job = allocate_cores(len(pending), n_workers)
+        print(f"⚙️ {len(pending)} jobs em {pool_size} processos ({cores_per_job} núcleo(s) por job)")
+
+        tmp_dir = tempfile.mkdtemp(prefix='obesity_training_')
+        data_path = os.path.join(tmp_dir, 'data.joblib')
+        try:
+            # Uma única cópia dos dados em disco; os workers a mapeiam somente leitura
+            joblib.dump({
+                'X_train': np.asarray(X_train), 'y_train': np.asarray(y_train),
+                'X_test': np.asarray(X_test), 'y_test': np.asarray(y_test),
+                'columns': columns
+            }, data_path)
+
+            jobs = [
+                delayed(_run_job)(data_path, name, clone(estimator), fold, train_idx, test_idx,
+                                  cores_per_job)
+                for name, _, estimator, fold, train_idx, test_idx in pending
+            ]
+            params_by_job = {(name, fold): params for name, params, _, fold, _, _ in pending}
+            # Resultados chegam à medida que os jobs terminam: cada um é
+            # gravado antes do próximo, então uma interrupção perde só os jobs em curso
+            for result in Parallel(n_jobs=pool_size, backend='loky',
+                                   return_as='generator_unordered')(jobs):
+                if store is not None:
+                    store.put(result['name'], params_by_job[(result['name'], result['fold'])],
+                              _fold_label(result['fold'], cv), result, data_hash)
+                job_results.append(result)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    wall_time = time.perf_counter() - start
+
+    results = {}
+    for name in models:
+        own = [r for r in job_results if r['name'] == name]
+        holdout = next(r for r in own if r['fold'] is None)
+        cv_scores = np.array([r['accuracy'] for r in sorted(
+            (r for r in own if r['fold'] is not None), key=lambda r: r['fold']
+        )])
+        results[name] = {
+            'model': holdout['model'],
+            'accuracy': holdout['accuracy'],
+            'f1_score': holdout['f1_score'],
+            'precision': holdout['precision'],
+            'recall': holdout['recall'],
+            'cv_mean': cv_scores.mean(),
+            'cv_std': cv_scores.std(),
+            'fit_time': holdout.get('fit_time', np.nan),
+            'predict_time': holdout.get('predict_time', np.nan),
+            'train_time': sum(r['time'] for r in own)
+        }
+    return results, wall_time
@@ -0,0 +1,231 @@
+"""
+Exportação de ensembles de árvores para arrays NumPy contíguos
+Tech Challenge - Sistema Preditivo de Obesidade
+
+Achata RandomForest/ExtraTrees/GradientBoosting em arrays globais
+(feature, threshold, filhos, valores das folhas) e avalia todas as
+árvores de uma vez, nível a nível, para o lote inteiro, em vez do loop por
+estimador do predict_proba do sklearn.
+"""
+import numpy as np
+from scipy.special import expit
+from sklearn.ensemble import (
+    ExtraTreesClassifier, GradientBoostingClassifier, RandomForestClassifier
+)
+
+# Limite de elementos (linhas x árvores) da matriz de nós por bloco de avaliação
+MAX_BLOCK_ELEMENTS = 4_000_000
+
+
+class FlatTreeEnsemble:
+    """Ensemble de árvores em arrays planos, avaliado de forma vetorizada"""
+
+    def __init__(self, kind, classes, feature, threshold, left, missing_left, is_leaf,
+                 values, roots, max_depth, learning_rate=None, init_raw=None, tree_class=None,
+                 value_scale=None, value_offset=0.0):
+        """
+        Args:
+            kind: 'forest' (média de probabilidades) ou 'gradient_boosting'
+            classes: Classes do modelo
+            feature, threshold, left, missing_left, is_leaf: Nós de todas as
+                árvores, com índices globais; o filho direito é left + 1 e as
+                folhas apontam para si mesmas
+            values: Valores das folhas (n_nós, n_saídas)
+            roots: Índice global da raiz de cada árvore
+            max_depth: Profundidade máxima entre as árvores
+            learning_rate, init_raw, tree_class: Apenas para gradient boosting
+            value_scale, value_offset: Se values estiver quantizado (inteiros),
+                o valor real é values * value_scale + value_offset
+        """
+        self.kind = kind
+        self.classes = np.asarray(classes)
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.missing_left = missing_left
+        self.is_leaf = is_leaf
+        self.values = values
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.learning_rate = learning_rate
+        self.init_raw = init_raw
+        self.tree_class = tree_class
+        self.value_scale = value_scale
+        self.value_offset = value_offset
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Exporta um RandomForest/ExtraTrees/GradientBoosting treinado"""
+        if isinstance(model, (RandomForestClassifier, ExtraTreesClassifier)):
+            kind = 'forest'
+            trees = [estimator.tree_ for estimator in model.estimators_]
+        elif isinstance(model, GradientBoostingClassifier):
+            kind = 'gradient_boosting'
+            # Ordem estágio a estágio, classe a classe (a mesma do predict do sklearn)
+            trees = [estimator.tree_ for estimator in model.estimators_.ravel()]
+        else:
+            raise TypeError(
+                f"Modelo não suportado para exportação: {type(model).__name__} "
+                "(apenas RandomForest, ExtraTrees e GradientBoosting)"
+            )
+
+        # Renumera os nós de cada árvore em largura, com os dois filhos sempre
+        # adjacentes (direito = esquerdo + 1): o próximo nó é left + (x > threshold)
+        orders = [_breadth_first_order(tree) for tree in trees]
+        sizes = np.array([tree.node_count for tree in trees])
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+
+        feature, threshold, left, missing_left, is_leaf = [], [], [], [], []
+        for tree, (order, new_left), offset in zip(trees, orders, offsets):
+            leaf = tree.children_left[order] == -1
+            node_ids = np.arange(tree.node_count) + offset
+            feature.append(np.where(leaf, 0, tree.feature[order]))
+            threshold.append(np.where(leaf, np.inf, tree.threshold[order]))
+            # Folhas viram laços: qualquer amostra que chega a uma folha permanece nela
+            left.append(np.where(leaf, node_ids, new_left + offset))
+            missing = np.asarray(getattr(tree, 'missing_go_to_left',
+                                         np.zeros(tree.node_count)))[order].astype(bool)
+            missing_left.append(missing | leaf)
+            is_leaf.append(leaf)
+
+        feature = np.concatenate(feature).astype(np.int32)
+        threshold = np.concatenate(threshold).astype(np.float64)
+        left = np.concatenate(left).astype(np.int32)
+        missing_left = np.concatenate(missing_left)
+        is_leaf = np.concatenate(is_leaf)
+
+        values = np.concatenate([
+            tree.value[order, 0, :] for tree, (order, _) in zip(trees, orders)
+        ]).astype(np.float64)
+        params = {}
+        if kind == 'forest':
+            # A partir do sklearn 1.4 tree_.value já guarda frações; versões
+            # anteriores guardam contagens e normalizam no predict_proba
+            normalizer = values.sum(axis=1, keepdims=True)
+            if not np.allclose(normalizer, 1.0):
+                normalizer[normalizer == 0.0] = 1.0
+                values = values / normalizer
+        else:
+            n_stages, n_outputs = model.estimators_.shape
+            if isinstance(model.init_, str) and model.init_ == 'zero':
+                init_raw = np.zeros(n_outputs)
+            else:
+                # Inicialização 'prior': constante, independe de X
+                init_raw = model._raw_predict_init(np.zeros((1, model.n_features_in_)))[0]
+            params = {
+                'learning_rate': float(model.learning_rate),
+                'init_raw': np.asarray(init_raw, dtype=np.float64),
+                'tree_class': np.tile(np.arange(n_outputs, dtype=np.int32), n_stages)
+            }
+
+        return cls(
+            kind=kind, classes=model.classes_, feature=feature, threshold=threshold,
+            left=left, missing_left=missing_left, is_leaf=is_leaf, values=values,
+            roots=offsets.astype(np.int32),
+            max_depth=max(tree.max_depth for tree in trees), **params
+        )
+
+    def apply(self, X):
+        """
+        Índices globais das folhas alcançadas por cada amostra em cada árvore
+
+        Percorre todas as árvores ao mesmo tempo, um nível por iteração; pares
+        (amostra, árvore) que já chegaram a uma folha saem do conjunto ativo.
+        X é convertido para float32 e comparado com os thresholds em float64,
+        exatamente como o sklearn faz.
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        has_nan = np.isnan(flat_X).any()
+
+        leaves = np.empty(n_rows * self.n_trees, dtype=np.int32)
+        nodes = np.tile(self.roots, n_rows)
+        position = np.arange(n_rows * self.n_trees, dtype=np.int64)
+        row_offset = (position // self.n_trees) * n_features
+        for _ in range(self.max_depth + 1):
+            done = self.is_leaf[nodes]
+            if done.any():
+                leaves[position[done]] = nodes[done]
+                active = ~done
+                nodes, position, row_offset = nodes[active], position[active], row_offset[active]
+                if not len(nodes):
+                    break
+            x = flat_X[row_offset + self.feature[nodes]]
+            go_right = x > self.threshold[nodes]
+            if has_nan:
+                go_right |= np.isnan(x) & ~self.missing_left[nodes]
+            nodes = self.left[nodes] + go_right
+        return leaves.reshape(n_rows, self.n_trees)
+
+    def _predict_block(self, X):
+        leaves = self.apply(X)
+        if self.kind == 'forest':
+            proba = np.zeros((len(X), self.values.shape[1]))
+            for t in range(self.n_trees):
+                proba += self.values[leaves[:, t]]
+            if self.values.dtype != np.float64:
+                # Folhas em precisão reduzida: renormaliza cada linha para somar 1
+                proba /= proba.sum(axis=1, keepdims=True)
+            else:
+                proba /= self.n_trees
+            return proba
+
+        raw = np.tile(self.init_raw, (len(X), 1))
+        leaf_values = self.values[leaves, 0].astype(np.float64)
+        if self.value_scale is not None:
+            leaf_values = leaf_values * self.value_scale + self.value_offset
+        for t in range(self.n_trees):
+            raw[:, self.tree_class[t]] += self.learning_rate * leaf_values[:, t]
+        if raw.shape[1] == 1:
+            positive = expit(raw[:, 0])
+            return np.column_stack([1 - positive, positive])
+        raw -= raw.max(axis=1, keepdims=True)
+        np.exp(raw, out=raw)
+        raw /= raw.sum(axis=1, keepdims=True)
+        return raw
+
+    def predict_proba(self, X):
+        """Probabilidades por classe (mesmo resultado do predict_proba do sklearn)"""
+        X = np.asarray(X)
+        block_rows = max(1, MAX_BLOCK_ELEMENTS // max(self.n_trees, 1))
+        if len(X) <= block_rows:
+            return self._predict_block(X)
+        return np.concatenate([
+            self._predict_block(X[start:start + block_rows])
+            for start in range(0, len(X), block_rows)
+        ])
+
+    def predict(self, X):
+        return self.classes[self.predict_proba(X).argmax(axis=1)]
+
+
+def _breadth_first_order(tree):
+    """
+    Ordem em largura dos nós de uma árvore do sklearn
+
+    Returns:
+        (order, new_left): order[i] é o nó original na nova posição i e
+        new_left[i] a nova posição do filho esquerdo (o direito vem logo após)
+    """
+    order = [0]
+    new_left = np.zeros(tree.node_count, dtype=np.int64)
+    for i in range(tree.node_count):
+        node = order[i]
+        if tree.children_left[node] != -1:
+            new_left[i] = len(order)
+            order += [tree.children_left[node], tree.children_right[node]]
+    return np.array(order), new_left
+
+
+def export_tree_ensemble(model):
+    """Atalho para FlatTreeEnsemble.from_sklearn"""
+    return FlatTreeEnsemble.from_sklearn(model)